@@ -1,9 +1,7 @@
 import streamlit as st
 from urllib.parse import urlparse
-import matplotlib.pyplot as plt
-from io import BytesIO
 
-from backend.finalUIfunc import SS_create
+from backend.finalUIfunc import SS_create, resume_upload
 from midas_civil import *
 import backend.midasfn_npg as fn  
 
@@ -71,11 +69,10 @@ if not st.session_state.submitted:
 
 # --- Main UI after config ---
 if st.session_state.submitted:
-    # Init Midas session
-    fn.MAPI_KEY(st.session_state.mapi_key)
-    fn.MAPI_BASEURL(st.session_state.base_url)
-    MAPI_KEY(st.session_state.mapi_key)
-    MAPI_BASEURL(st.session_state.base_url)
+    # Init Midas session, one per user so concurrent users do not share the connection or the created thicknesses
+    if "midas" not in st.session_state:
+        st.session_state.midas = fn.MidasSession(st.session_state.base_url, st.session_state.mapi_key)
+    session = st.session_state.midas
 
     # Two-column layout
     col1, col2 = st.columns(2)
@@ -84,7 +81,11 @@ if st.session_state.submitted:
     with col1:
         custom_header("Frame Section to Plate", size=26, align="left")
 
-        sections = fn.get_Section()
+        # Section tables are cached per model, reload them after editing sections in Civil NX
+        if st.button("Reload sections"):
+            fn.section_cache.invalidate(st.session_state.base_url, st.session_state.mapi_key)
+
+        sections = fn.get_Section(session)
         if not sections:
             st.error("No PSC sections found.")
         else:
@@ -98,23 +99,35 @@ if st.session_state.submitted:
             st.markdown("### Centerline Plot Viewer")
 
             if selected_section_name:
+                # Figure is cached per section content, reruns of unchanged sections only redisplay it
                 with st.spinner("Please wait while generating the plot..."):
-                    fig = fn.PSC_1CEL_XY(selected_section_id)
+                    fig = fn.PSC_1CEL_XY(selected_section_id, session=session)
 
-                st.pyplot(fig)
+                with fn.figure_lock:
+                    st.pyplot(fig)
                 st.session_state.plot_generated = True
 
                 # --- Download button ---
-                buf = BytesIO()
-                fig.savefig(buf, format="png", dpi=300, bbox_inches="tight")
-                buf.seek(0)
-
-                st.download_button(
-                    label="Download Image",
-                    data=buf,
-                    file_name=f"PSC_Section_{selected_section_id}.png",
-                    mime="image/png"
-                )
+                # Image is encoded only on request, the bytes are cached per section and format
+                col_fmt, col_prep = st.columns([2,1])
+                with col_fmt:
+                    export_fmt = st.selectbox("Image format", list(fn.EXPORT_FORMATS.keys()))
+                with col_prep:
+                    prepare = st.button("Prepare download")
+                export_key = (selected_section_id, export_fmt)
+                if prepare:
+                    st.session_state.export_key = export_key
+
+                if st.session_state.get("export_key") == export_key:
+                    with st.spinner("Encoding image..."):
+                        data = fn.export_centerline(selected_section_id, export_fmt, session=session)
+                    ext, mime, _ = fn.EXPORT_FORMATS[export_fmt]
+                    st.download_button(
+                        label="Download Image",
+                        data=data,
+                        file_name=f"PSC_Section_{selected_section_id}.{ext}",
+                        mime=mime
+                    )
 
     # --- Right panel: Line to Plate Converter ---
     with col2:
@@ -125,35 +138,44 @@ if st.session_state.submitted:
         with col_mesh:
             switch_chngMesh = st.checkbox("Meshing option (Size or division)", value=True)
             # Mesh label depends on checkbox
-            mesh_label = "No. of division" if switch_chngMesh else "Mesh Size (length)"
+            mesh_label = "No. of division" if switch_chngMesh else "Mesh Size (length in M)"
 
         with col_rigid:
             chk_RigdLnk = st.checkbox("Rigid Link", value=True)
-        txt_mesh = st.number_input(mesh_label, min_value=0, value=20, step=1)
+        if switch_chngMesh:
+            txt_mesh = st.number_input(mesh_label, min_value=0, value=20, step=1, key="mesh_div")
+        else:
+            txt_mesh = st.number_input(mesh_label, min_value=0.0, value=1.0, step=0.1, key="mesh_size")
 
            
 
             # Run button
         if st.button("Create Mesh"):
             # fn.PSC_1CEL_XY(selected_section_id)
-                fn.plotsegment()
-                fn.build_global_arrays()
                 try:
                     nSeg = txt_mesh
                     mSize = 0
                     if not switch_chngMesh:
-                        mSize = txt_mesh
+                        # Typed in M, the alignment is in the model length unit
+                        mSize = txt_mesh / fn.model_length_factor(session)
                         nSeg = 0
 
-                    # Run mesh generation
-                    SS_create(int(nSeg), float(mSize), bool(chk_RigdLnk))
+                    # Run mesh generation, the mesh is sent in chunks
+                    bar = st.progress(0.0, text="Sending mesh...")
+                    result = SS_create(int(nSeg), float(mSize), bool(chk_RigdLnk), session=session, progress=lambda table, sent, total: bar.progress(sent/total, text=f"Sending {table}... {sent}/{total}"))
 
-                    Thickness.create()
-                    Node.create()
-                    Element.create()
-                    if chk_RigdLnk:
-                        Boundary.RigidLink.create()
+                    if len(result['chains']) > 1:
+                        st.warning(f"Selection is not one continuous line, {len(result['chains'])} lines were converted : " + " | ".join(f"elements {c}" for c in result['chains']))
+                    st.success("Plates created successfully!")
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
 
+        # A failed upload keeps the chunks already accepted, only the rest is sent again
+        if session.upload is not None and not session.upload.done:
+            if st.button("Resume upload"):
+                try:
+                    bar = st.progress(session.upload.sent/max(session.upload.total, 1), text="Resuming upload...")
+                    resume_upload(session, progress=lambda table, sent, total: bar.progress(sent/total, text=f"Sending {table}... {sent}/{total}"))
                     st.success("Plates created successfully!")
                 except Exception as e:
                     st.error(f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.centerline import PARTS, psc_centerline
+
+# Centerlines of every PSC 1-Cell & 2-Cell section of a model in one go.
+# The section tables are read once, the sections are computed on a process pool and written to a single JSON file.
+
+#---------------------------------------------------------------------------------------------------------------------------
+#Function run on the worker processes, it only needs numpy (no Civil NX connection)
+def _centerline_job(job):
+    """job = (section ID, section inputs in M, section properties in MM, vectorized).
+    Returns (section ID, result or None, error or None, seconds)."""
+    sid, inp, prop, vectorized = job
+    start = time.perf_counter()
+    try:
+        result = centerline_to_json(psc_centerline(inp, prop, vectorized))
+        error = None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return sid, result, error, time.perf_counter() - start
+
+def centerline_to_json(result):
+    """psc_centerline result with the arrays turned into lists, coordinates & thicknesses in M."""
+    cl = result['centerline']
+    parts = {}
+    for name in PARTS:
+        pts, thk = cl.part(name)
+        parts[name] = {'points': pts.tolist(), 'thk': thk.tolist()}
+    return {'shape': result['shape'],
+            'outline': {k: v.tolist() for k, v in result['outline'].items()},
+            'ortho_lines': result['ortho_lines'].tolist(),
+            'parts': parts}
+
+#---------------------------------------------------------------------------------------------------------------------------
+def batch_centerlines(sections = None, session = None, max_workers = None, vectorized = True):
+    """Centerlines of the sections (list of IDs, all PSC 1CEL / 2CEL sections of the model if None).
+    Returns {'model', 'sections': {ID: {'name', 'time', ...centerline}}, 'failures': {ID: error}, 'timings'}.
+    max_workers = number of processes (CPU count if None), 1 computes in this process."""
+    import backend.midasfn_npg as fn
+    start = time.perf_counter()
+    via = fn._transport(session)
+    (sect_json, sect_to_m), (prop_json, prop_to_m) = fn.section_cache.fetch(["SECT", "SECTPROP"], via)
+    names = dict(fn.get_Section(session))
+    if sections is None: sections = list(names)
+    inp = fn._sect_inp_table(sect_json, sections, sect_to_m)
+    prop = fn._sect_prop_table(prop_json, sections, length_scale=prop_to_m*1000)
+    if type(inp) != dict: inp = {}
+    fetched = time.perf_counter()
+
+    jobs, failures = [], {}
+    for sid in sections:
+        if sid in inp and sid in prop:
+            jobs.append((sid, inp[sid], prop[sid], vectorized))
+        else:
+            failures[sid] = "Section is not defined in connected model."
+
+    workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        done = list(map(_centerline_job, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_centerline_job, jobs, chunksize=max(1, len(jobs)//(4*workers))))
+
+    out = {}
+    for sid, result, error, elapsed in done:
+        if error is None:
+            out[sid] = {'name': names.get(sid, inp[sid].get('SECT_NAME', '')), 'time': elapsed, **result}
+        else:
+            failures[sid] = error
+    end = time.perf_counter()
+
+    return {'model': via.scope()[0],
+            'sections': out,
+            'failures': failures,
+            'timings': {'fetch': fetched - start, 'compute': end - fetched, 'total': end - start,
+                        'sections': len(out), 'workers': workers}}
+
+def write_batch(path, sections = None, session = None, max_workers = None, vectorized = True):
+    """batch_centerlines written to one JSON file.  Returns the batch result.  Sample: write_batch("centerlines.json")"""
+    batch = batch_centerlines(sections, session, max_workers, vectorized)
+    with open(path, "w") as f:
+        json.dump(batch, f)
+    return batch
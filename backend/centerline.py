@@ -0,0 +1,500 @@
+import numpy as np
+
+# Headless centerline engine for PSC 1-Cell & 2-Cell sections.  Only numpy is needed, nothing here draws or talks to Civil NX.
+
+PARTS = ['top_flange', 'bot_flange', 'left_web', 'right_web', 'mid_web']
+
+#---------------------------------------------------------------------------------------------------------------------------
+#Function to remove duplicate set of values from 2 lists
+def unique_lists(li1, li2):
+    if type (li1) == list and type (li2) == list:
+        if len(li1) == len(li2):
+            indices_to_remove = []
+            for i in range(len(li1)):
+                for j in range(i+1,len(li1)):
+                    if li1[i] == li1[j] and li2[i] == li2[j]:
+                        indices_to_remove.append(j)
+            for index in sorted(indices_to_remove, reverse = True):
+                del li1[index]
+                del li2[index]
+#---------------------------------------------------------------------------------------------------------------------------
+ORTHO_TOL = 1e-6    #Coordinates closer than this are treated as the same point when removing duplicate orthogonal lines
+
+def line_key(line, tol = ORTHO_TOL):
+    """Hashable key of line (x1, y1, x2, y2, ...) with the end points quantized to tol."""
+    return (round(line[0]/tol), round(line[1]/tol), round(line[2]/tol), round(line[3]/tol))
+#---------------------------------------------------------------------------------------------------------------------------
+NODE_TOL = 1e-9     #Centerline points closer than this share one node of the cross-section mesh
+
+class Centerline:
+    """Centerline of a PSC section held in contiguous arrays, coordinates & thicknesses in M.
+    points  : (n,2) points of all parts, part after part.
+    thk     : (n,) thickness of the segment starting at each point, 0 at the last point of a part.
+    offsets : (len(names)+1,) points of part names[i] are points[offsets[i]:offsets[i+1]]."""
+    __slots__ = ('names', 'points', 'thk', 'offsets')
+
+    def __init__(self, names, points, thk, offsets):
+        self.names = tuple(names)
+        self.points = np.ascontiguousarray(points, dtype=float).reshape(-1, 2)
+        self.thk = np.ascontiguousarray(thk, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=int)
+
+    @classmethod
+    def from_parts(cls, parts):
+        """parts = {name: ((k,2) points, (k-1,) segment thicknesses)} in drawing order."""
+        names = list(parts)
+        sizes = [len(parts[n][0]) for n in names]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        points = np.zeros((offsets[-1], 2))
+        thk = np.zeros(offsets[-1])
+        for i, n in enumerate(names):
+            pts, seg_thk = parts[n]
+            points[offsets[i]:offsets[i+1]] = pts
+            thk[offsets[i]:offsets[i]+len(seg_thk)] = seg_thk
+        return cls(names, points, thk, offsets)
+
+    def __len__(self):
+        return len(self.points)
+
+    def part(self, name):
+        """(k,2) points and (k-1,) segment thicknesses of one part, views into the arrays."""
+        i = self.names.index(name)
+        a, b = self.offsets[i], self.offsets[i+1]
+        return self.points[a:b], self.thk[a:max(a, b-1)]
+
+    def segment_starts(self):
+        """Indices of the points that start a segment (every point except the last one of each part)."""
+        start = np.ones(len(self.points), dtype=bool)
+        ends = self.offsets[1:]
+        start[ends[ends > self.offsets[:-1]] - 1] = False
+        return np.flatnonzero(start)
+
+    def mesh_arrays(self, tol = NODE_TOL):
+        """Nodes (m,2), lines (s,2) of node indices and thicknesses (s,) for the cross-section mesh.
+        Points closer than tol (shared by connected parts) become one node, nodes keep the order of first appearance."""
+        if len(self.points) == 0:
+            return np.empty((0, 2)), np.empty((0, 2), dtype=int), np.empty(0)
+        keys = np.round(self.points/tol).astype(np.int64)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        node_of = rank[inverse.ravel()]
+        s = self.segment_starts()
+        return self.points[first[order]], np.column_stack([node_of[s], node_of[s+1]]), self.thk[s]
+#---------------------------------------------------------------------------------------------------------------------------
+#Function to get the orthogonal lines from the vertices of curve 2 on the edges of curve 1 (all pairs at once)
+def ortho_lines_np(li1, li2, li3, li4, d = 1, h = 1, v = 1):
+    """li1 & li2 are list of X & Y ordinates of curve 1.  li3 & li4 are X&Y of curve 2.
+    Returns [(x3, y3, x_perp, y_perp, thk)] for every vertex/edge pair whose perpendicular foot lies on the edge and 0.0001 <= thk <= d.
+    h = 0 drops horizontal lines, v = 0 drops vertical lines.  Same lines and order as ortho_line_plot."""
+    e = np.asarray([li1, li2], dtype=float)
+    x1, y1, x2, y2 = e[0, :-1], e[1, :-1], e[0, 1:], e[1, 1:]      # edges  (E,)
+    x3 = np.asarray(li3, dtype=float)[:, None]                      # vertices (V,1)
+    y3 = np.asarray(li4, dtype=float)[:, None]
+    vert = x2 == x1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m = (y2 - y1) / (x2 - x1)
+        c = y1 - m * x1
+        x_perp = (x3 + m * (y3 - c)) / (1 + m**2)
+        y_perp = m * x_perp + c
+    x_perp = np.where(vert, x1, x_perp)                             # (V,E)
+    y_perp = np.where(vert, y3, y_perp)
+    l1 = ((x_perp - x1)**2 + (y_perp - y1)**2)**0.5
+    l2 = ((x_perp - x2)**2 + (y_perp - y2)**2)**0.5
+    l3 = ((x2 - x1)**2 + (y2 - y1)**2)**0.5
+    thk = ((x3 - x_perp)**2 + (y3 - y_perp)**2)**0.5
+    mask = (np.round(l1 + l2, 5) == np.round(l3, 5)) & (thk <= d) & (thk >= 0.0001)
+    if h == 0: mask &= (y3 != y_perp)
+    if v == 0: mask &= (x3 != x_perp)
+    iv, ie = np.nonzero(mask)
+    return list(zip(x3[iv, 0].tolist(), y3[iv, 0].tolist(), x_perp[iv, ie].tolist(), y_perp[iv, ie].tolist(), thk[iv, ie].tolist()))
+#---------------------------------------------------------------------------------------------------------------------------
+#Geometry helpers
+def perpendicular_point(x1, y1, x2, y2, x3, y3, l=0):
+    """Function to get orthogonal point on line (x1,y1)-(x2,y2) from point (x3,y3). Enter l=0 for point 3 in between 1 & 2.  Enter l=1 for other scenario."""
+    if x2 != x1:
+        m = (y2 - y1) / (x2 - x1)
+        c = y1 - m * x1
+        x_perp = (x3 + m * (y3 - c)) / (1 + m**2)
+        y_perp = m * x_perp + c
+    else:
+        x_perp, y_perp = x1, y3
+
+    l1 = ((x_perp - x1)**2 + (y_perp - y1)**2)**0.5
+    l2 = ((x_perp - x2)**2 + (y_perp - y2)**2)**0.5
+    l3 = ((x2 - x1)**2 + (y2 - y1)**2)**0.5
+    thk = ((x3 - x_perp)**2 + (y3 - y_perp)**2)**0.5
+    if round(l1 + l2,5) == round(l3,5) and l == 0:
+        return x_perp, y_perp, thk
+    elif l==1:
+        return x_perp, y_perp, thk
+
+def ortho_line_plot(li1, li2, li3, li4, lines, d = 1, h = 1, v = 1):
+    """li1 & li2 are list of X & Y ordinates of curve 1.  li3 & li4 are X&Y of curve 2.
+    Orthogonal lines are created from curve 2 vertices on curve 1.  Scalar version of ortho_lines_np."""
+    for x3, y3 in zip(li3,li4):
+        for i in range(len(li1) - 1):
+            x1, y1 = li1[i], li2[i]
+            x2, y2 = li1[i + 1], li2[i + 1]
+            lin = perpendicular_point(x1, y1, x2, y2, x3, y3)
+            if type(lin) == tuple:
+                if lin[2] <= d and lin[2]>=0.0001:
+                    if h == 0 and v== 0:
+                        if y3 != lin[1] and x3 != lin[0]:
+                            lines.append((x3, y3, lin[0], lin[1], lin[2]))
+                    elif h == 0:
+                        if y3 != lin[1]:
+                            lines.append((x3, y3, lin[0], lin[1], lin[2]))
+                    elif v == 0:
+                        if x3 != lin[0]:
+                            lines.append((x3, y3, lin[0], lin[1], lin[2]))
+                    else:
+                        lines.append((x3, y3, lin[0], lin[1], lin[2]))
+
+def lower_2(data):
+    """Find the lower 2 coordinates in a web"""
+    sorted_items = sorted(data.items(), key=lambda item: item[1]['ym'])
+    smallest_two = sorted_items[:2]
+    result = [(item[1]['xm'], item[1]['ym']) for item in smallest_two]
+    return result
+
+def left_2(data):
+    """Find the left 2 coordinates in a flange"""
+    sorted_items = sorted(data.items(), key=lambda item: item[1]['xm'])
+    smallest_two = sorted_items[:2]
+    result = [(item[1]['xm'], item[1]['ym']) for item in smallest_two]
+    return result
+
+def intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+    """To find intersection points of 2 lines, used to find intersection of webs and bottom flange"""
+    den = (x2 - x1) * (y4 - y3) - (y2 - y1) * (x4 - x3)
+    det_t = (x3 - x1) * (y4 - y3) - (y3 - y1) * (x4 - x3)
+    t = det_t / den
+    x = x1 + t * (x2 - x1)
+    y = y1 + t * (y2 - y1)
+    return (x , y)
+
+def point_on_line(x1, y1, x2, y2, x3, y3):
+    """Function to check if the point (x3,y3) is on line (x1,y1)-(x2,y2).  Used to distinguish dictionaries for flanges & webs."""
+    if round((y2 - y1) * (x3 - x1),5) == round((y3 - y1) * (x2 - x1),5):
+        return 1
+    else:
+        return 0
+
+def part_len(dic, length):
+    """Function used to divid a curve to required length."""
+    for i in range(1, len(dic)):
+        dist = ((dic[i]['xm'] - dic[i+1]['xm'])**2 + (dic[i]['ym'] - dic[i+1]['ym'])**2)**0.5
+        if dist > length:
+            nos = int(dist/length) + 1
+            for j in range(1, nos):
+                dic.update({i+0.01*j:{
+                    'thk': dic[i]['thk']+(dic[i+1]['thk'] - dic[i]['thk'])*j/nos,
+                    'xm': dic[i]['xm']+(dic[i+1]['xm'] - dic[i]['xm'])*j/nos,
+                    'ym': dic[i]['ym']+(dic[i+1]['ym'] - dic[i]['ym'])*j/nos}})
+
+def reorder(dic):
+    """Reorder a dictionary based on it's keys and renumber them from 1 onwards"""
+    sorted_dic = {k:v for k,v in sorted(dic.items())}
+    new = {i: value for i, value in enumerate(sorted_dic.values(), start=1)}
+    return new
+
+def xysort(dic, x=1):
+    """Reorder a dictionary based on xm and ym values.  Enter x = 1 for sorting xm first and then ym.  Enter 0 for ym first and xm later."""
+    if x == 1:
+        sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['xm'], item[1]['ym']))}
+        new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=1)}
+    elif x == 0:
+        sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['ym'], item[1]['xm']))}
+        new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=1)}
+    return new_dic
+
+def connector(web = [], flange = []):
+    """List of web dictionaries, List of flange dictionaries.  Used to create connecting lines from webs to flanges."""
+    if web !=[] and flange !=[]:
+        y2 = min(value['ym'] for value in flange[1].values())
+
+        # Find top and bottom ordinate of each web
+        xw_max, yw_max = [], []
+        xw_min, yw_min = [], []
+        thk_min, thk_max = [], []
+        for dic in web:
+            max_ym_key = max(dic, key=lambda k: dic[k]['ym'])
+            xw_max.append(dic[max_ym_key]['xm'])
+            yw_max.append(dic[max_ym_key]['ym'])
+            thk_max.append(dic[max_ym_key]['thk'])
+            min_ym_key = min(dic, key=lambda k: dic[k]['ym'])
+            xw_min.append(dic[min_ym_key]['xm'])
+            yw_min.append(dic[min_ym_key]['ym'])
+            thk_min.append(dic[min_ym_key]['thk'])
+
+        # Find intersection point of each web with both the flanges
+        xo_max, yo_max = [None]*len(xw_max), [None]*len(yw_max)
+        xo_min, yo_min = [], []
+        for i in range(len(xw_min)):
+            dist = 999999
+            for dic in flange:
+                for j in range(1,len(dic)-1):
+                    pp = perpendicular_point(dic[j]['xm'], dic[j]['ym'], dic[j+1]['xm'], dic[j+1]['ym'], xw_max[i], yw_max[i])
+                    if pp != None:
+                        dist = min(dist, pp[2])
+                        if pp[2] <= dist:
+                            xo_max[i] = pp[0]
+                            yo_max[i] = pp[1]
+        flange_left_xy = left_2(flange[1])
+        web_left_xy = lower_2(web[0])
+        if len(web)>2: mid_xy = lower_2(web[2])
+        pp = intersect(web_left_xy[0][0], web_left_xy[0][1], web_left_xy[1][0], web_left_xy[1][1],
+                    flange_left_xy[0][0], flange_left_xy[0][1], flange_left_xy[1][0], flange_left_xy[1][1])
+        xo_min.append(pp[0])
+        yo_min.append(pp[1])
+        xo_min.append(pp[0] * -1)
+        yo_min.append(pp[1])
+        if len(web)>2:
+            pp = intersect(mid_xy[0][0], mid_xy[0][1], mid_xy[1][0], mid_xy[1][1],
+                    0, y2, 5, y2)
+            xo_min.append(pp[0])
+            yo_min.append(pp[1])
+        return [xo_max, yo_max, thk_max, xo_min, yo_min, thk_min]
+#---------------------------------------------------------------------------------------------------------------------------
+#Outline of the PSC 1-Cell & 2-Cell section
+def psc_outline(inp, zt):
+    """inp = /db/SECT entry with dimensions in M (sect_inp), zt = Zt in MM (sect_prop).
+    Returns (x, y, ix, iy) for 1CEL or (x, y, ix, iy, ix_1, iy_1) for 2CEL as closed polygons, and the external & internal vertices (right half)."""
+    oh = inp['SECT_BEFORE']['SECT_I']['vSIZE_PSC_A']
+    ob = inp['SECT_BEFORE']['SECT_I']['vSIZE_PSC_B']
+    ih = inp['SECT_BEFORE']['SECT_I']['vSIZE_PSC_C']
+    ib = inp['SECT_BEFORE']['SECT_I']['vSIZE_PSC_D']
+    oht = oh[0] + oh[1] + oh[4]
+    iht = ih[0] + ih[1] + ih[4] + ih[6] + ih[9]
+    diff_ht = oht - iht
+    if oht > iht:
+        y0 = (zt/1000 - diff_ht)                #y0
+    else:
+        y0 = (zt/1000)                          #y0
+    x0 = (0)                                    #x0
+    x1 = (ob[0] + ob[3] + ob[5])                #x1
+    y1 = (y0 + diff_ht)                         #y1
+    x2 = (x1)                                   #x2
+    y2 = (y1 - oh[0])                           #y2
+    x3 = (x1 - ob[1])                           #x3
+    y3 = (y2 - oh[2])                           #y3
+    x4 = (x3 - max(0, ob[2]-ob[1]))             #x4
+    y4 = (y2 - oh[3])                           #y4
+    x5 = (x1 - ob[0])                           #x5
+    y5 = (y2 - oh[1])                           #y5
+    x6 = (x5 - ob[3] + ob[4])                   #x6
+    y6 = (y5 - oh[4] + oh[5])                   #y6
+    x7 = (ob[5])                                #x7
+    y7 = (y6 - oh[5])                           #y7
+    x8 = (0)                                    #x8
+    y8 = (y7)                                   #y8
+    external = []
+    x = [x0, x1, x2, x3, x4, x5, x6, x7, x8]
+    y = [y0, y1, y2, y3, y4, y5, y6, y7, y8]
+    for i in range(len(x)): external.append((x[i],y[i]))
+    x_1 = [-a for a in x]
+    x_1.reverse()
+    x = x + x_1
+    y.extend(reversed(y))
+    if oht > iht:
+        y0 = (zt/1000 - diff_ht - ih[0])                #iy0
+    else:
+        y0 = (zt/1000 - ih[0])                          #iy0
+    if inp['SECT_BEFORE']['SHAPE'] == '1CEL':
+        x0 = (0)                                        #ix0
+    else:
+        x0 = ib[7]                                      #ix0
+    y1 = (y0 - ih[2])                                   #iy1
+    x1 = (x0 + ib[1])                                   #ix1
+    y2 = (y1 + max(0, ih[3] - ih[2]))                   #iy2
+    x2 = (x1 + max(0, ib[2] - ib[1]))                   #ix2
+    y3 = (y0 - ih[1])                                   #iy3
+    x3 = (ib[0])                                        #ix3
+    y4 = (y3 - ih[5])                                   #iy4
+    x4 = (ib[3])                                        #ix4
+    y5 = (y0 - ih[1] - ih[4])                           #iy5
+    x5 = (ib[4])                                        #ix5
+    y8 = y5 - ih[6]                                     #iy8
+    x8 = x0                                             #ix8
+    y7 = y8 + ih[7]                                     #iy7
+    x7 = ib[5]                                          #ix7
+    y6 = y8 + max(ih[7], ih[8])                         #iy6
+    x6 = max (ib[5], ib[6])                             #ix6
+    internal = []
+    ix = [x0, x1, x2, x3, x4, x5, x6, x7, x8]
+    iy = [y0, y1, y2, y3, y4, y5, y6, y7, y8]
+    for i in range(len(ix)): internal.append((ix[i],iy[i]))
+    ix_1 = [-a for a in ix]
+    ix_1.reverse()
+    unique_lists(x, y)
+    x.append(x[0])
+    y.append(y[0])
+    if inp['SECT_BEFORE']['SHAPE'] == '1CEL':
+        ix = ix + ix_1
+        iy.extend(reversed(iy))
+    else:
+        iy_1 = iy[::-1]
+        unique_lists(ix_1, iy_1)
+        ix_1.append(ix_1[0])
+        iy_1.append(iy_1[0])
+    unique_lists(ix, iy)
+    ix.append(ix[0])
+    iy.append(iy[0])
+    if inp['SECT_BEFORE']['SHAPE'] == '1CEL':
+        a = x, y, ix, iy
+    else:
+        a =  x, y, ix, iy, ix_1, iy_1
+    return a, external, internal
+#---------------------------------------------------------------------------------------------------------------------------
+#Centerline of the PSC 1-Cell & 2-Cell section
+def psc_centerline(inp, prop, vectorized = True):
+    """inp = /db/SECT entry with dimensions in M (sect_inp(sec)[sec]), prop = section properties in MM (sect_prop(sec)[sec]).
+    Returns {'shape', 'outline': {'external', 'internal_1'[, 'internal_2']} as (n,2) arrays, 'ortho_lines': (n,5) array of (x1, y1, x2, y2, thk),
+    'centerline': Centerline of the parts in PARTS}.
+    Coordinates are in M.  vectorized = False uses the scalar orthogonal line search."""
+    if not (inp['SECTTYPE'] == 'PSC' and inp['SECT_BEFORE']['SHAPE'][-3:] == 'CEL'):
+        raise ValueError(f"Section {inp.get('SECT_NAME', '')} is not a PSC 1CEL / 2CEL section.")
+    a, external, internal = psc_outline(inp, prop['Zt'])
+    ortho = ortho_lines_np if vectorized else _ortho_list
+
+    ortho_lines = []
+    ortho_lines += ortho(a[0],a[1],a[2],a[3])
+    ortho_lines += ortho(a[0],a[1],a[0],a[1], h = 0)
+    if len(a) == 6:
+        ortho_lines += ortho(a[0],a[1],a[4],a[5])
+        ortho_lines += ortho(a[4],a[5],a[2],a[3], d = 0.5)
+
+    dic = {}
+    seen = set()    # Quantized end points of the lines already in dic
+    for i in range(len(ortho_lines)):
+        if (ortho_lines[i][2] - ortho_lines[i][0]) !=0:
+            m = (ortho_lines[i][3] - ortho_lines[i][1])/(ortho_lines[i][2] - ortho_lines[i][0])
+        else:
+            m = 10000
+        key = line_key(ortho_lines[i])
+        if key not in seen:
+            seen.add(key)
+            dic.update({i:{
+                'x1': ortho_lines[i][0],
+                'y1': ortho_lines[i][1],
+                'x2': ortho_lines[i][2],
+                'y2': ortho_lines[i][3],
+                'thk': ortho_lines[i][4],
+                'slope': m,
+                'xm': (ortho_lines[i][0] + ortho_lines[i][2])/2,
+                'ym': (ortho_lines[i][1] + ortho_lines[i][3])/2}})
+    del seen
+
+    # Sorting the dictionary based on the vertical ordinates and then in accordance to horizontal ordinates
+    sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['xm'], item[1]['ym']))}
+    new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=0)}
+    del sorted_data
+
+    # Separating and creating new dictionaries, bifurcating the webs and flanges
+    s, t, u, v, w = 1, 1, 1, 1, 1
+    mid_web, top_flange, bot_flange, left_web, right_web = {}, {}, {}, {}, {}
+    for i in new_dic.keys():
+        if point_on_line(external[0][0], external[0][1], external[1][0], external[1][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            top_flange.update({t : new_dic[i]})
+            t += 1
+        elif point_on_line(external[0][0], external[0][1], -1*external[1][0], external[1][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            top_flange.update({t : new_dic[i]})
+            t =+ 1
+        elif point_on_line(external[7][0], external[7][1], external[8][0], external[8][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            bot_flange.update({u : new_dic[i]})
+            u += 1
+        elif point_on_line(external[5][0], external[5][1], external[7][0], external[7][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            right_web.update({v : new_dic[i]})
+            v += 1
+        elif point_on_line(-1*external[5][0], external[5][1], -1*external[7][0], external[7][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            left_web.update({w : new_dic[i]})
+            w += 1
+        elif point_on_line(-1*internal[0][0], internal[0][1], -1*internal[8][0], internal[8][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
+            mid_web.update({s : new_dic[i]})
+            s += 1
+
+    #Creating the dictionary with connecting points
+    if mid_web == {}: li = connector([left_web, right_web],[top_flange, bot_flange])
+    if mid_web != {}: li = connector([left_web, right_web, mid_web],[top_flange, bot_flange])
+
+    # Update flange and web dictionaries to consider end points
+    top_flange.update({0.0001:{'xm':li[0][0],
+                        'ym': li[1][0],
+                        'thk': li[2][0]},
+                    0.0002:{'xm':li[0][1],
+                        'ym': li[1][1],
+                        'thk': li[2][1]}})
+    if mid_web != {}:
+        top_flange.update({0.0003:{'xm':li[0][2],
+                        'ym': li[1][2],
+                        'thk': li[2][2]}})
+    bot_flange.update({0.0001:{'xm':li[3][0],
+                        'ym': li[4][0],
+                        'thk': li[5][0]},
+                    0.0002:{'xm':li[3][1],
+                        'ym': li[4][1],
+                        'thk': li[5][1]}})
+    if mid_web != {}:
+        bot_flange.update({0.0003:{'xm':li[3][2],
+                        'ym': li[4][2],
+                        'thk': li[5][2]}})
+    left_web.update({0.0001:{'xm':li[0][0],
+                        'ym':li[1][0],
+                        'thk': li[2][0]},
+                    0.0002:{'xm':li[3][0],
+                        'ym':li[4][0],
+                        'thk': li[5][0]}})
+    right_web.update({0.0001:{'xm':li[0][1],
+                        'ym':li[1][1],
+                        'thk': li[2][1]},
+                    0.0002:{'xm':li[3][1],
+                        'ym':li[4][1],
+                        'thk': li[5][1]}})
+    if mid_web != {}:
+        mid_web.update({0.0001:{'xm':li[0][2],
+                            'ym':li[1][2],
+                            'thk': li[2][2]},
+                        0.0002:{'xm':li[3][2],
+                            'ym':li[4][2],
+                            'thk': li[5][2]}})
+
+    # Sort and renumber flange and web dictionaries to consider connecting elements at proper locations
+    top_flange = xysort(top_flange,1)
+    bot_flange = xysort(bot_flange,1)
+    right_web = xysort(right_web,0)
+    left_web = xysort(left_web,0)
+    if mid_web != {}: mid_web = xysort(mid_web,0)
+
+    # Dividing the flanges & webs close to the required length of elements
+    dictionary = [top_flange, bot_flange, right_web, left_web]
+    for i in range(len(dictionary)):
+        part_len(dictionary[i], 0.3)
+        dictionary[i] = reorder(dictionary[i])
+    top_flange = dictionary[0]
+    bot_flange = dictionary[1]
+    right_web = dictionary[2]
+    left_web = dictionary[3]
+    if mid_web != {}:
+        part_len(mid_web,0.3)
+        mid_web = reorder(mid_web)
+
+    parts = {}
+    for name, part in zip(PARTS, [top_flange, bot_flange, left_web, right_web, mid_web]):
+        pts = np.array([[part[i]['xm'], part[i]['ym']] for i in range(1, len(part)+1)], dtype=float).reshape(-1, 2)
+        thk = np.array([part[i]['thk'] for i in range(1, len(part)+1)], dtype=float)
+        parts[name] = (pts, (thk[:-1] + thk[1:])/2)
+
+    outline = {'external': np.column_stack([a[0], a[1]]), 'internal_1': np.column_stack([a[2], a[3]])}
+    if len(a) == 6: outline['internal_2'] = np.column_stack([a[4], a[5]])
+    return {'shape': inp['SECT_BEFORE']['SHAPE'],
+            'outline': outline,
+            'ortho_lines': np.array(ortho_lines, dtype=float).reshape(-1, 5),
+            'centerline': Centerline.from_parts(parts)}
+
+def _ortho_list(li1, li2, li3, li4, d = 1, h = 1, v = 1):
+    """ortho_line_plot returning the lines, same call as ortho_lines_np."""
+    lines = []
+    ortho_line_plot(li1, li2, li3, li4, lines, d, h, v)
+    return lines
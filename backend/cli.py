@@ -0,0 +1,78 @@
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+# midas_civil prints its banner on import and the pipeline prints its warnings, stdout is kept for the JSON report
+with contextlib.redirect_stdout(sys.stderr):
+    import backend.midasfn_npg as fn
+    from backend.finalUIfunc import SS_create
+
+# Headless beam to plate conversion, same pipeline as the "Create Mesh" button of app.py.
+# Sample:  python -m backend.cli --base-url https://moa-engineers.midasit.com:443/civil --key xxxx --divisions 20 --elements 1to10 --elements 21,22,23
+
+#---------------------------------------------------------------------------------------------------------------------------
+def parse_elements(text):
+    """Element IDs from "1,2,5to9" (ranges also as 5-9).  Sample: parse_elements("1,4to6") = [1, 4, 5, 6]"""
+    ids = []
+    for item in text.replace(" ", "").split(","):
+        if item == "": continue
+        sep = "to" if "to" in item else ("-" if "-" in item[1:] else None)
+        if sep:
+            a, b = item.split(sep, 1)
+            ids += list(range(int(a), int(b)+1))
+        else:
+            ids.append(int(item))
+    return ids
+
+def run(base_url, mapi_key, element_lines, divisions = 20, mesh_size = 0, rigid_link = True):
+    """Converts each list of beam elements in element_lines (one girder line each) to plates.
+    divisions = number of segments along the line, used when mesh_size is 0.  mesh_size = plate length along the line in M.
+    Returns {'lines': [{'elements', 'ok', 'error', 'chains', 'timings'}], 'failed', 'total'}, a failed line does not stop the next ones.
+    chains = beam elements of each continuous line meshed, more than one when the elements of a line are not continuous."""
+    session = fn.MidasSession(base_url, mapi_key)
+    report = {'lines': [], 'failed': 0}
+    start = time.perf_counter()
+    try:
+        nSeg, mSize = (0, float(mesh_size) / fn.model_length_factor(session)) if mesh_size else (int(divisions), 0.0)
+        for elems in element_lines:
+            line = {'elements': list(elems), 'ok': True, 'error': None, 'chains': [], 'timings': {}}
+            try:
+                line['timings'] = SS_create(nSeg, mSize, rigid_link, session=session, elem_list=elems)
+                line['chains'] = line['timings'].pop('chains')
+            except Exception as e:
+                line['ok'], line['error'] = False, f"{type(e).__name__}: {e}"
+                report['failed'] += 1
+            report['lines'].append(line)
+    finally:
+        session.close()
+    report['total'] = time.perf_counter() - start
+    report['api'] = session.transport.stats()
+    return report
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Convert PSC beam elements of a Civil NX model to plates.")
+    parser.add_argument("--base-url", required=True, help="Civil NX API base URL")
+    parser.add_argument("--key", required=True, help="MAPI key")
+    mesh = parser.add_mutually_exclusive_group()
+    mesh.add_argument("--divisions", type=int, default=20, help="number of plate divisions along each line (default 20)")
+    mesh.add_argument("--mesh-size", type=float, default=0, help="plate length along the line, in M")
+    parser.add_argument("--no-rigid-link", dest="rigid_link", action="store_false", help="do not link the beam end nodes to the plates")
+    parser.add_argument("--elements", action="append", required=True, type=parse_elements,
+                        help="beam elements of one girder line, e.g. 1to10 or 1,2,3.  Repeat for several lines")
+    parser.add_argument("--report", help="write the timing report to this JSON file instead of stdout")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args.base_url, args.key, args.elements, args.divisions, args.mesh_size, args.rigid_link)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if report['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,83 +1,78 @@
 import numpy as np
 import backend.midasfn_npg as fn 
-from backend.midasfn_npg import array_1 
 from midas_civil import *
-import math
+from backend.midasfn_npg import MidasAPI
 from scipy.interpolate import splev, splprep
 from math import hypot
+import time
 
 
 class L2P:
     mesh_size = 0.1
+    share_station_nodes = True      # One ring of nodes per station, used by the plates on both sides of it
+    sync_model = False              # True loads the whole model before meshing, False only reads the next free IDs & the node coordinates
 
 # 1. -------------     Getting selected elements, sorting the nodes, deleting the middle node    -------------------
 
-# Takes in [[1,2] , [3,4] ,[2,3]] returns [1,2,3,4]
-def arrangeNodeList(n_list,elm_list):
-    ''' Return arranged Nodes list (1D) and Element list (1D)'''
-
-    n_list_2 = n_list[1:]
-    ord_list=[n_list[0]]
-
-    e_list2 = elm_list[1:]
-    e_ord_list=[elm_list[0]]
-
-
-    add_pos = 1 # 1 => Last  | -1 => first
-    flip_count=0
-
-    def arrangeNode(ordList,n_list,add_pos,flip_count,elm_list,e_ord_list):
-        
-        for i in range(len(n_list)):
-            if add_pos == 1:
-                if ordList[-1][1] == n_list[i][0]:
-                    ordList.append(n_list[i])
-                    e_ord_list.append(elm_list[i])
-                    del elm_list[i]
-                    del n_list[i]
-                    # print(f'Last add  | {ordList}')
-                    return
-            elif add_pos == -1:
-                if ordList[0][0] == n_list[i][1]:
-                    ordList.insert(0,n_list[i])
-                    e_ord_list.insert(0,elm_list[i])
-                    del n_list[i]
-                    del elm_list[i]
-                    # print(f'First add  | {ordList}')
-                    return
-                
-        add_pos = add_pos*-1
-        flip_count += 1
-        # print(f'Flipped | {ordList} | {n_list} | {add_pos}')
-        if flip_count == 1 : arrangeNode(ordList,n_list,add_pos,flip_count,elm_list,e_ord_list)
-        
+# Takes in [[1,2] , [3,4] ,[2,3]] returns [([1,2,3,4], elements)]
+def elementChains(n_list,elm_list):
+    ''' n_list = [[node_i, node_j], ...] of the elements in elm_list.
+    Returns every continuous chain as (node list, element list), elements may point either way.
+    The chain of the first element comes first and runs in its direction.  Linear in the number of elements.'''
+    adj = {}    # node : indices of the elements connected to it
+    for k, (a, b) in enumerate(n_list):
+        adj.setdefault(a, []).append(k)
+        adj.setdefault(b, []).append(k)
+    used = [False]*len(n_list)
+
+    def walk(node):
+        # Follow unused elements from node, returns the nodes & elements met on the way
+        nodes, elems = [], []
+        while True:
+            nxt = next((k for k in adj[node] if not used[k]), None)
+            if nxt is None: return nodes, elems
+            used[nxt] = True
+            a, b = n_list[nxt]
+            node = b if a == node else a
+            nodes.append(node)
+            elems.append(elm_list[nxt])
+
+    chains = []
+    for k in range(len(n_list)):
+        if used[k]: continue
+        used[k] = True
+        a, b = n_list[k]
+        fwd_nodes, fwd_elems = walk(b)
+        back_nodes, back_elems = walk(a)
+        chains.append((back_nodes[::-1] + [a, b] + fwd_nodes, back_elems[::-1] + [elm_list[k]] + fwd_elems))
+    return chains
 
-
-    for _ in range(len(n_list_2)):
-        arrangeNode(ord_list,n_list_2,add_pos,flip_count,e_list2,e_ord_list)
-
-    if len(ord_list) < len(n_list):
-        print('⚠️  Element not in a single continuous line | Smaller segment is returned')
-    
-    simple_ord_list = [ord_list[0][0],ord_list[0][1]]
-    for i in range(len(ord_list)-1):
-        simple_ord_list.append(ord_list[i+1][1])
-
-    return simple_ord_list, e_ord_list
+def arrangeNodeList(n_list,elm_list):
+    ''' Return arranged Nodes list (1D) and Element list (1D) of the chain of the first element'''
+    chains = elementChains(n_list,elm_list)
+    if len(chains) > 1:
+        print(f'⚠️  Element not in a single continuous line | {len(chains)} chains found, the one of element {elm_list[0]} is returned')
+        for nodes, elems in chains:
+            print(f'    Elements {elems}')
+    return chains[0]
 
 
-# Returns sorted nodes and alignment coordinates for the selected elements
-def delSelectElements():
+# Returns sorted nodes and alignment coordinates of every chain of the selected elements
+def delSelectElements(session=None, elem_list=None):
     ''' 
-        Deletes the middle nodes
-        Returns sorted nodes and alignment coordinates for the selected elements
-        Returns material ID of first element
-        Returns sectID of each beam element
+        elem_list = beam element IDs to convert, the elements selected in Civil NX (/view/SELECT) if None
+        The selection is split in continuous chains (elementChains), each one is a girder line of its own
+        Deletes the middle nodes (the element of a single element chain)
+        Returns for each chain (first one is the chain of the first element) :
+        (sorted nodes, alignment coordinates, beta angles, sorted elements, material ID of first element, sectID of each beam element, k)
     '''
 
 
-    node_json = MidasAPI('GET','/view/SELECT')
-    align_elem_list = node_json['SELECT']['ELEM_LIST']
+    if elem_list is None:
+        node_json = MidasAPI('GET','/view/SELECT',session=session)
+        align_elem_list = node_json['SELECT']['ELEM_LIST']
+    else:
+        align_elem_list = list(elem_list)
 
     if align_elem_list == []:
         raise Exception("No elements selected ☹️")
@@ -86,64 +81,50 @@ def delSelectElements():
     # print(f'{align_elem_list}')
 
 
-    align_elem_list_url = ",".join(map(str, align_elem_list))
-    align_elem_json = MidasAPI('GET',f'/db/ELEM/{align_elem_list_url}')
-
-    align_nodes_list =[]
-    align_elem_list=[]
-
+    # Chunked concurrent reads, merged into one map indexed by element ID
+    elem_map = {int(e): v for e, v in fn.MidasAPI_ids('GET','/db/ELEM',align_elem_list,session=session).items()}
 
-    for elmID in align_elem_json['ELEM']:
-        nodes = align_elem_json['ELEM'][elmID]['NODE']
-        align_nodes_list.append([nodes[0],nodes[1]])
-        align_elem_list.append(elmID)
+    align_elem_list = list(elem_map)
+    align_nodes_list = [elem_map[e]['NODE'][:2] for e in align_elem_list]
 
-    arrangeLIST, arrangeLIST_ELM = arrangeNodeList(align_nodes_list,align_elem_list)
-    # print(arrangeLIST)
+    chains = elementChains(align_nodes_list,align_elem_list)
+    if len(chains) > 1:
+        print(f'⚠️  Elements not in a single continuous line | {len(chains)} chains found, each one is converted')
 
+    all_nodes = [nd for nodes, _ in chains for nd in nodes]
+    node_map = {int(n): v for n, v in fn.MidasAPI_ids('GET','/db/NODE',list(dict.fromkeys(all_nodes)),session=session).items()}
 
-    matID = align_elem_json['ELEM'][arrangeLIST_ELM[0]]['MATL']
+    selections = []
+    del_elems, del_nodes = [], []
+    for arrangeLIST, arrangeLIST_ELM in chains:
+        chain_elems = [elem_map[e] for e in arrangeLIST_ELM]
 
-    sec_ID_list_arranged = []
-    for elmID in arrangeLIST_ELM:
-        sec_ID_list_arranged.append(align_elem_json['ELEM'][elmID]['SECT'])
+        matID = chain_elems[0]['MATL']
 
-    # align_nodes_list = sorted(align_nodes_list)
-    align_nodes_list = arrangeLIST
+        sec_ID_list_arranged = [el['SECT'] for el in chain_elems]
 
-    align_nodes_list_url = ",".join(map(str, align_nodes_list))
-    node_json = MidasAPI('GET',f'/db/NODE/{align_nodes_list_url}')
+        align_coordinates_list = [[node_map[nd]['X'], node_map[nd]['Y'], node_map[nd]['Z']] for nd in arrangeLIST]
 
+        if len(arrangeLIST)==2:
+            del_elems.append(arrangeLIST_ELM[0])
+            k=1
+        else:
+            del_nodes += arrangeLIST[1:-1]
+            k=min(3,len(arrangeLIST)-1)
 
-    align_coordinates_list = [] 
+        angle = [el['ANGLE']*3.141/180 for el in chain_elems]
+        beta_angle = [angle[0]]
+        for i in range(len(angle)-1):
+            beta_angle.append(0.5*angle[i]+0.5*angle[i+1])
+        beta_angle.append(angle[-1])
 
-    for nd in align_nodes_list:
-        align_coordinates_list.append([ node_json['NODE'][str(nd)]['X'] , node_json['NODE'][str(nd)]['Y'] , node_json['NODE'][str(nd)]['Z'] ])
+        selections.append((arrangeLIST, align_coordinates_list, beta_angle, arrangeLIST_ELM, matID, sec_ID_list_arranged, k))
 
-    k=3
+    # Beams are removed once all chains are read
+    if del_elems: fn.MidasAPI_ids('DELETE','/db/ELEM',del_elems,session=session)
+    if del_nodes: fn.MidasAPI_ids('DELETE','/db/NODE',del_nodes,session=session)
 
-    if len(align_nodes_list)==2:
-        MidasAPI('DELETE',f'/db/ELEM/{arrangeLIST_ELM[0]}')
-        k=1
-
-    else:
-        align_nodes_list_url = ",".join(map(str, align_nodes_list[1:-1]))
-        MidasAPI('DELETE',f'/db/NODE/{align_nodes_list_url}')
-        k=min(3,len(align_nodes_list)-1)
-
-
-    beta_angle = [align_elem_json['ELEM'][str(arrangeLIST_ELM[0])]['ANGLE']*3.141/180]
-    for i in range(len(align_nodes_list)-2):
-        ba1 = align_elem_json['ELEM'][str(arrangeLIST_ELM[i])]['ANGLE']*3.141/180
-        ba2 = align_elem_json['ELEM'][str(arrangeLIST_ELM[i+1])]['ANGLE']*3.141/180
-        beta_angle.append(0.5*ba1+0.5*ba2)
-    beta_angle.append(align_elem_json['ELEM'][str(arrangeLIST_ELM[-1])]['ANGLE']*3.141/180)
-
-
-
-
-
-    return align_nodes_list, align_coordinates_list,  beta_angle , arrangeLIST_ELM , matID , sec_ID_list_arranged,k
+    return selections
 
 
 
@@ -155,73 +136,84 @@ def delSelectElements():
 
 
 
-# Orient section as per plane
-def _orientPoint(plane_ax,plane_og,coord):
-    #Plane orient
-
-    Y_new = np.array(plane_ax[1])
-    Z_new = np.array(plane_ax[0])
+# Orient sections as per plane
+def _stationFrames(plane_x,plane_y,beta_ang):
+    ''' Local axis of each station (n,3) , up vector (n,3) and beta angle (n) -> (n,2,3) matrices.
+    Row 0 / 1 is where the section X / Y axis goes in 3D, beta rotation included. '''
+    Z_new = np.asarray(plane_x,dtype=float)
+    Y_new = np.broadcast_to(np.asarray(plane_y,dtype=float),Z_new.shape)
     X_new = np.cross(Y_new, Z_new)
-
     Y_new = np.cross(Z_new, X_new) # Recomputing
 
-    X_new = X_new / np.linalg.norm(X_new)
-    Y_new = Y_new / np.linalg.norm(Y_new)
-    Z_new = Z_new / np.linalg.norm(Z_new)
-
-    # Rotation matrix: columns are new basis vectors in original system
-    R = np.vstack((X_new, Y_new, Z_new))
+    X_new = X_new / np.linalg.norm(X_new,axis=1,keepdims=True)
+    Y_new = Y_new / np.linalg.norm(Y_new,axis=1,keepdims=True)
 
-    # Original coordinate
-    n_3dCord = coord.copy()
-    n_3dCord.append(0)
-    v = np.array(n_3dCord)
-    # Transform the vector to the new coordinate system
-    p_rot = np.dot(R.T, v)
+    c = np.cos(beta_ang)[:,None]
+    s = np.sin(beta_ang)[:,None]
+    return np.stack([c*X_new + s*Y_new , c*Y_new - s*X_new],axis=1)
 
-
-    # Origin transform
-    new_cord = [ p_rot[0]+plane_og[0] , p_rot[1]+plane_og[1] , p_rot[2]+plane_og[2] ]
-    return new_cord
+def _placeSections(section_cordinates,frames,plane_origin):
+    ''' Section points (n_stations, n_points, 2) -> 3D points (n_stations, n_points, 3), one matrix product per station '''
+    return np.matmul(section_cordinates,frames) + np.asarray(plane_origin,dtype=float)[:,None,:]
 
 # Create nodes
-def _createSectNodes(section_cordinates,plane_axis,plane_origin,beta_ang=0):
-    node_ids = []
-
-    for cord in section_cordinates:
-
-        X = cord[0]*math.cos(beta_ang) - cord[1]*math.sin(beta_ang)
-        Y = cord[1]*math.cos(beta_ang) + cord[0]*math.sin(beta_ang)
-
-        ord = _orientPoint(plane_axis,plane_origin,[X,Y])    # Cord is 2D ; ord is 3D
-        node_ids.append(Node(ord[0],ord[1],ord[2]).ID)
-
-    return node_ids
-
-
-def _createTapSectPlate(section_cordinates1,section_cordinates2,sect_lineCon,thk_plate,thk_plate_off,start_plane_axis,start_plane_origin,start_beta_angle,end_plane_axis,end_plane_origin,end_beta_angle,matID):
-
-    s_nodes = _createSectNodes(section_cordinates1,start_plane_axis,start_plane_origin,start_beta_angle)
-    e_nodes = _createSectNodes(section_cordinates2,end_plane_axis,end_plane_origin,end_beta_angle)
-
-    for i in range(len(sect_lineCon)):
-
-        thick_id=isCreateThick(int(thk_plate[i]*100)/100,int(thk_plate_off[i]*100)/100)
-
-        p_node = sect_lineCon[i][0]-1
-        q_node = sect_lineCon[i][1]-1
-
-        Element.Plate([s_nodes[p_node] , e_nodes[p_node] , e_nodes[q_node] , s_nodes[q_node]],3,int(matID),thick_id)
-
-    return s_nodes, e_nodes
-
-
-
-def createTapPlateAlign(align_points,t_param,beta_angle,Section4Plate,rigid_LNK = False,matID=99):
+def _createSectNodes(section_points,model_nodes=None):
+    ''' 3D points (n,3) of one station -> node IDs.  model_nodes = fn.NodeIndex, coincident model nodes are used instead of new ones '''
+    found = model_nodes.find(section_points) if model_nodes is not None else [0]*len(section_points)
+    return [nid or Node(x,y,z).ID for (x,y,z),nid in zip(section_points.tolist(),found)]
+
+
+def _plateConnectivity(s_grid,e_grid,sect_lineCon):
+    ''' Node ID rings at the start & end of each interval (n_intervals, n_points) -> plate nodes (n_intervals*n_lines, 4) '''
+    line = np.asarray(sect_lineCon,dtype=int)-1
+    p_node, q_node = line[:,0], line[:,1]
+    quads = np.stack([s_grid[:,p_node], e_grid[:,p_node], e_grid[:,q_node], s_grid[:,q_node]],axis=-1)
+    return quads.reshape(-1,4)
+
+def _rigidLinkBody(body,beam_nodes,session=None):
+    ''' /db/RIGD body of the new rigid links (Boundary.RigidLink.json()).  Without L2P.sync_model the links already on the beam nodes
+    are read (only those nodes) and the new items are appended to them, so a pier node shared by two converted spans keeps both links '''
+    if L2P.sync_model or not body["Assign"]:
+        return body
+    existing = fn.MidasAPI_ids("GET","/db/RIGD",sorted(set(beam_nodes)),chunk_size=1,session=session)
+    for master, link in body["Assign"].items():
+        items = existing.get(str(master),{}).get("ITEMS",[])
+        if items:
+            first = max(int(item.get("ID",0)) for item in items)+1
+            for k, item in enumerate(link["ITEMS"]):
+                item["ID"] = first+k
+            link["ITEMS"] = items+link["ITEMS"]
+    return body
+
+def _plateThickIDs(thk_plate,thk_plate_off,session=None):
+    ''' Thickness & offset of every plate -> Thickness IDs from the session thickness registry (fn.ThicknessRegistry) '''
+    return (session or fn.default_session).thicknesses.assign(thk_plate,thk_plate_off)
+
+def _platePayload(quads,thick_id,matID,first_id,stype=3):
+    ''' /db/ELEM assign body of the plates with IDs from first_id.  Quads with a repeated node become triangles, lines are skipped '''
+    rep = (quads[:,0]==quads[:,1])|(quads[:,1]==quads[:,2])|(quads[:,2]==quads[:,3])|(quads[:,3]==quads[:,0])|(quads[:,0]==quads[:,2])|(quads[:,1]==quads[:,3])
+    assign = {}
+    eid = first_id
+    for nodes, sect, r in zip(quads.tolist(), thick_id.tolist(), rep.tolist()):
+        if r:
+            nodes = list(dict.fromkeys(nodes))
+            if len(nodes) < 3: continue
+        assign[eid] = {"TYPE":"PLATE", "MATL":int(matID), "SECT":sect, "NODE":nodes, "ANGLE":0, "STYPE":stype}
+        eid += 1
+    return {"Assign":assign}
+
+
+
+def createTapPlateAlign(align_points,t_param,beta_angle,Section4Plate,rigid_LNK = False,matID=99,session=None,share_nodes=None,beam_nodes=None):
     ''' Alignment points = [ [0,0,0] , [10,1,0]  , [20,0,0], [30,1,0]],
     t_param = [0,0.1,0.2,0.3,0.5...] list used for tap section
      Local Z vector of section is assumed [0,0,1]
-      Direction is assumed  '''
+      Direction is assumed
+    share_nodes = True creates each station ring once for both neighbouring intervals (default L2P.share_station_nodes),
+    False creates the start & end rings of every interval separately
+    beam_nodes = (start, end) node IDs of the beam the rigid links attach to, found by coordinates if None
+    Nodes, thicknesses and rigid links are added to the midas_civil classes, the plates are returned as one /db/ELEM body  '''
+    if share_nodes is None: share_nodes = L2P.share_station_nodes
     
     align_num_points = len(align_points)
 
@@ -231,26 +223,37 @@ def createTapPlateAlign(align_points,t_param,beta_angle,Section4Plate,rigid_LNK
         align_x_vec.append(np.add(np.subtract(align_points[i+2],align_points[i+1]), np.subtract(align_points[i+1],align_points[i])))
     align_x_vec.append(np.subtract(align_points[-1],align_points[-2]))
 
-    align_plane = [ [p, [0.0001,0,1]] for p in align_x_vec]
+    # Section of every station, then all of them placed in 3D at once : (n_stations, n_points, 3)
+    station_shapes, thk, thk_off = getTapShapes(t_param[:align_num_points],Section4Plate)
+    frames = _stationFrames(align_x_vec,[0.0001,0,1],np.asarray(beta_angle[:align_num_points],dtype=float))
+    station_points = _placeSections(station_shapes,frames,align_points)
+    # End rings can meet a span converted earlier, they reuse its nodes (model not loaded, see L2P.sync_model)
+    model_nodes = (session or fn.default_session).ids.nodes
+    last = len(station_points)-1
+    if share_nodes:
+        station_nodes = np.array([_createSectNodes(pts,model_nodes if i in (0,last) else None) for i,pts in enumerate(station_points)],dtype=int)
+        s_grid, e_grid = station_nodes[:-1], station_nodes[1:]
+    else:
+        s_grid = np.array([_createSectNodes(pts,model_nodes if i == 0 else None) for i,pts in enumerate(station_points[:-1])],dtype=int)
+        e_grid = np.array([_createSectNodes(pts,model_nodes if i == last-1 else None) for i,pts in enumerate(station_points[1:])],dtype=int)
 
+    # Thickness of each interval is the average of its end stations : (n_intervals, n_lines)
+    thk_avg = 0.5*(thk[:-1]+thk[1:])
+    thk_off_avg = 0.5*(thk_off[:-1]+thk_off[1:])
 
-    for i in range(align_num_points-1):
-        ti = t_param[i]
-        tf = t_param[i+1]
-        shp1 , thk1 , thk_off1= getTapShape(ti,Section4Plate)
-        shp2, thk2, thk_off2 = getTapShape(tf,Section4Plate)
+    quads = _plateConnectivity(s_grid,e_grid,Section4Plate.LINE)
+    thick_id = _plateThickIDs(thk_avg,thk_off_avg,session)
+    plates = _platePayload(quads,thick_id,matID,Element.maxID+1)
+    Element.maxID += len(plates["Assign"])
 
-        thk_avg = np.multiply(np.add(thk1,thk2),0.5)
-        thk_off_avg = np.multiply(np.add(thk_off1,thk_off2),0.5)
-        snode,enode = _createTapSectPlate(shp1,shp2,Section4Plate.LINE,thk_avg,thk_off_avg,align_plane[i],align_points[i],beta_angle[i],align_plane[i+1],align_points[i+1],beta_angle[i+1],matID)
+    if rigid_LNK:
+        if beam_nodes is None:
+            beam_nodes = (Node(align_points[0][0],align_points[0][1],align_points[0][2]).ID, Node(align_points[-1][0],align_points[-1][1],align_points[-1][2]).ID)
+        Boundary.RigidLink(beam_nodes[0],s_grid[0].tolist())
+        if align_num_points > 2:
+            Boundary.RigidLink(beam_nodes[1],e_grid[-1].tolist())
 
-        if rigid_LNK:
-            if i == 0 :
-                beamnode = Node(align_points[0][0],align_points[0][1],align_points[0][2]).ID
-                Boundary.RigidLink(beamnode,snode)
-            elif i == align_num_points-2:
-                beamnode = Node(align_points[-1][0],align_points[-1][1],align_points[-1][2]).ID
-                Boundary.RigidLink(beamnode,enode)
+    return plates
 
 
 
@@ -345,56 +348,42 @@ def intpolateScalar(t,S1,t1,S2,t2):
 
     return S_t
 
-def getTapShape(t,plateTapSect):
-    eq_chk = 0
-    i_c = 0
-    for i in range(len(plateTapSect.T)):
-        if t == plateTapSect.T[i_c] :
-            eq_chk=1
-            break
-        elif t > plateTapSect.T[i_c] and t < plateTapSect.T[i_c+1]:
-            break
-        i_c+=1
-    
-    thick_curr = plateTapSect.THICK[i_c] 
-    thick_off_curr = plateTapSect.THICK_OFF[i_c] 
-
-    if eq_chk:
-        return plateTapSect.POINTS[i_c] , thick_curr, thick_off_curr
-    else:
-        ti = plateTapSect.T[i_c]
-        tf = plateTapSect.T[i_c+1]
-
-        Si = plateTapSect.POINTS[i_c]
-        Sf = plateTapSect.POINTS[i_c+1]
+def getTapShapes(t,plateTapSect):
+    ''' Sections of plateTapSect at every parameter of t, bracketed with np.searchsorted in plateTapSect.T and interpolated at once.
+    Returns points (n_t, n_points, 2), thickness & offset (n_t, n_lines).  A parameter equal to one of T gives that section. '''
+    T = np.asarray(plateTapSect.T,dtype=float)
+    t = np.asarray(t,dtype=float)
+    n_line = len(plateTapSect.LINE)
+    pts = np.asarray(plateTapSect.POINTS,dtype=float)
+    thk = np.array([np.broadcast_to(np.asarray(th,dtype=float),n_line) for th in plateTapSect.THICK])
+    off = np.array([np.broadcast_to(np.asarray(th,dtype=float),n_line) for th in plateTapSect.THICK_OFF])
+    if len(T) == 1:
+        return np.repeat(pts,len(t),axis=0), np.repeat(thk,len(t),axis=0), np.repeat(off,len(t),axis=0)
+
+    i = np.clip(np.searchsorted(T,t,side='right')-1,0,len(T)-2)
+    t_diff = T[i+1]-T[i]
+    wi = ((T[i+1]-t)/t_diff)[:,None]
+    wf = ((t-T[i])/t_diff)[:,None]
+    return pts[i]*wi[:,:,None]+pts[i+1]*wf[:,:,None], thk[i]*wi+thk[i+1]*wf, off[i]*wi+off[i+1]*wf
 
-        thi=plateTapSect.THICK[i_c]
-        thf=plateTapSect.THICK[i_c+1]
-
-        th_off_i=plateTapSect.THICK_OFF[i_c]
-        th_off_f=plateTapSect.THICK_OFF[i_c+1]
-    
-    
-        return intpolatePOINTS(t,Si,ti,Sf,tf) , intpolatePOINTS(t,thi,ti,thf,tf), intpolatePOINTS(t,th_off_i,ti,th_off_f,tf)
+def getTapShape(t,plateTapSect):
+    ''' Section points, thickness & offset of plateTapSect at the parameter t (see getTapShapes) '''
+    pts, thk, off = getTapShapes([t],plateTapSect)
+    return pts[0], thk[0], off[0]
 
 
 
 
 
-glob_thick_json = {}
-def isCreateThick(thick,thick_off):
-    if f'{thick}+{thick_off}' in glob_thick_json:
-        return glob_thick_json[f'{thick}+{thick_off}']
-    else:
-        tid= Thickness(thick,offset=thick_off,off_type='val').ID
-        glob_thick_json[f'{thick}+{thick_off}']=tid
-        return tid
+def isCreateThick(thick,thick_off,session=None):
+    ''' Thickness ID of thick & offset, an existing one of the model / session (fn.ThicknessRegistry) or a new one '''
+    return int(_plateThickIDs([thick],[thick_off],session)[0])
 
 
 
 
 #----------------------------------------------------------------
-def Mesh_SHAPE(shape,meshSize=1):
+def Mesh_SHAPE(shape,meshSize=1,session=None):
     ''' Shape is a object from midas library
     Retrurns Section points (SHAPE), Thickness, CG , Line connection of plates
     
@@ -429,14 +418,20 @@ def Mesh_SHAPE(shape,meshSize=1):
         sect_thk = [tf,tw]
         sect_thk_off = [-tf/2,-tw/2]
     elif shape.SHAPE == "1CEL":
-        sect_shape, sect_lin_con,sect_thk = fn.build_global_arrays()
+        # Cached centerline of this section, computed again only if it was edited
+        sect_shape, sect_lin_con,sect_thk = fn.section_centerline(shape.ID, session).mesh_arrays()
+        to_m = fn.model_length_factor(session)     # Centerline is in M, mesh is in model units
+        sect_shape, sect_thk = sect_shape/to_m, sect_thk/to_m
         sect_lin_con = sect_lin_con+1
         sect_thk_off = [0 for _ in sect_lin_con]
         sect_cg = [0,0]
         
         
     elif shape.SHAPE == "2CEL":
-        sect_shape, sect_lin_con,sect_thk = fn.build_global_arrays()
+        # Cached centerline of this section, computed again only if it was edited
+        sect_shape, sect_lin_con,sect_thk = fn.section_centerline(shape.ID, session).mesh_arrays()
+        to_m = fn.model_length_factor(session)     # Centerline is in M, mesh is in model units
+        sect_shape, sect_thk = sect_shape/to_m, sect_thk/to_m
         sect_lin_con = sect_lin_con+1
         sect_thk_off = [0 for _ in sect_lin_con]
         sect_cg = [0,0]
@@ -451,21 +446,120 @@ def Mesh_SHAPE(shape,meshSize=1):
 
 
 
-def SS_create(nSeg , mSize , bRigdLnk):
-    # ORIGINAL ALIGNMENT
-    
-    node_list , align_points, align_beta_angle , elm_list, matID , align_sectID_list_sorted,k = delSelectElements() # Select elements
-
+def SS_create(nSeg , mSize , bRigdLnk, session=None, elem_list=None, progress=None):
+    ''' Converts the selected beam elements (or the elements in elem_list) to plates.  session = fn.MidasSession of the user, default session if None.
+    The model is read, meshed & uploaded under its own lock (fn.model_lock), only building the mesh in midas_civil's class level model
+    holds the process wide fn.mesh_lock, so a slow model does not hold up the others.
+    The mesh is sent with fn.MeshUpload (progress(table, sent, total) after each chunk), kept in session.upload to resume it if it fails.
+    A selection made of several continuous lines meshes each of them (one upload for all).
+    Returns the seconds spent in each stage {'select', 'read', 'alignment', 'sync' (L2P.sync_model only), 'sections', 'plates', 'create', 'upload', 'total'}
+    (summed over the lines) and 'chains' : the beam elements of each line converted. '''
+    session = session or fn.default_session
+    timings = {}
+    start = time.perf_counter()
+    with fn.model_lock(session.scope()):
+        t = time.perf_counter()
+        selections = delSelectElements(session, elem_list) # Select elements, one selection per continuous line
+        t = _lap(timings, 'select', t)
+
+        sect_json = _readModel(session)
+        t = _lap(timings, 'read', t)
+
+        try:
+            with fn.mesh_lock:
+                session.activate()
+                bodies = _SS_create(nSeg, mSize, bRigdLnk, session, selections, sect_json, timings)
+        finally:
+            session.ids.release()
+
+        t = time.perf_counter()
+        beam_nodes = [nd for sel in selections for nd in (sel[0][0],sel[0][-1])]
+        bodies["RIGD"] = _rigidLinkBody(bodies["RIGD"],beam_nodes,session)
+        # A previous upload not resumed is dropped
+        if session.upload is not None: session.upload.discard()
+        session.upload = fn.MeshUpload(bodies, session=session)
+        session.upload.run(progress)
+        timings['upload'] = time.perf_counter() - t
+    timings['total'] = time.perf_counter() - start
+    timings['chains'] = [list(sel[3]) for sel in selections]
+    return timings
+
+def resume_upload(session=None, progress=None):
+    ''' Sends the chunks of the last mesh of the session that were not acknowledged.  Returns True if there was something to resume. '''
+    session = session or fn.default_session
+    if session.upload is None or session.upload.done:
+        return False
+    with fn.model_lock(session.upload.scope):
+        session.upload.run(progress)
+    return True
+
+def _lap(timings, stage, start):
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0) + now - start    # Summed over the lines of a selection
+    return now
+
+def _readModel(session):
+    ''' Model reads done without fn.mesh_lock : the current SECT, SECTPROP & UNIT tables (the mesh never uses stale cached sections)
+    and, without L2P.sync_model, the next free IDs & the thicknesses of the model.  Returns the /db/SECT response '''
+    def _refreshSections():
+        return fn.section_cache.fetch(["SECT","SECTPROP","UNIT"],session.transport,refresh=True)[0][0]
+
+    if L2P.sync_model:
+        return _refreshSections()
+    sect_json, _ = fn.run_concurrent([_refreshSections, session.ids.refresh])
+    session.thicknesses.seed({"THIK": session.ids.thik})
+    return sect_json
+
+def _loadSections(sect_json):
+    ''' Section class of midas_civil rebuilt from a /db/SECT response, as Section.sync does without reading it again '''
+    from midas_civil._section import _JS2OBJ
+    Section.sect = []
+    Section.ids = []
+    for sect_id, js in (sect_json or {}).get('SECT',{}).items():
+        _JS2OBJ(sect_id,js)
+
+def _SS_create(nSeg , mSize , bRigdLnk, session, selections, sect_json, timings):
+    ''' Builds the mesh of every selection (delSelectElements) in the midas_civil classes, call it holding fn.mesh_lock.
+    Returns the THIK, NODE, ELEM & RIGD bodies to upload '''
+    t = time.perf_counter()
+    _loadSections(sect_json)
+    if L2P.sync_model:
+        # Independent model reads run concurrently (Element.sync needs the nodes, so it follows Node.sync)
+        def _syncNodeElem():
+            Node.sync()
+            Element.sync()
+
+        session.ids.reset()
+        fn.run_concurrent([_syncNodeElem, Thickness.sync, Boundary.RigidLink.sync])
+        session.thicknesses.seed({"THIK": Thickness.json()["Assign"]})    # Same fields as /db/THIK
+        t = _lap(timings, 'sync', t)
+    else:
+        # Only the next free IDs were read, new objects are numbered from them and only they are sent
+        Node.clear()
+        Element.clear()
+        Thickness.clear()
+        Boundary.RigidLink.clear()
+        Node.maxID = session.ids.next["NODE"]-1
+        Element.maxID = session.ids.next["ELEM"]-1
+
+    plates = {"Assign":{}}
+    for selection in selections:
+        plates["Assign"].update(_meshChain(nSeg, mSize, bRigdLnk, session, selection, timings)["Assign"])
+
+    # Bodies are built here, under the lock, and sent in chunks by SS_create
+    t = time.perf_counter()
+    bodies = {"THIK": Thickness.json(), "NODE": Node.json(), "ELEM": plates, "RIGD": Boundary.RigidLink.json()}
+    t = _lap(timings, 'create', t)
+    return bodies
+
+def _meshChain(nSeg , mSize , bRigdLnk, session, selection, timings):
+    ''' Plates of one continuous line, nodes, thicknesses & rigid links are added to the midas_civil classes.  Returns the /db/ELEM body '''
+    t = time.perf_counter()
+    node_list , align_points, align_beta_angle , elm_list, matID , align_sectID_list_sorted,k = selection
 
     # NEW SMOOTH ALIGNMENT
-    fine_align_points = align_points
-    fine_beta_angle = align_beta_angle
-
     fine_align_points, fine_beta_angle, fine_t_param, align_t_param = interpolateAlignment(align_points,align_beta_angle,nSeg,2,mSize)
-
-
-
-    Section.sync()
+    t = _lap(timings, 'alignment', t)
 
     sect_shape_arr = []
     sect_points_arr =[]
@@ -475,7 +569,7 @@ def SS_create(nSeg , mSize , bRigdLnk):
     lin =[]
     
 
-    align_sectID_list_sorted.insert(0, align_sectID_list_sorted[0])  # ADD first section again to match node count
+    align_sectID_list_sorted = [align_sectID_list_sorted[0]] + list(align_sectID_list_sorted)  # ADD first section again to match node count
 
     for Sid in align_sectID_list_sorted:
         for sect in Section.sect:
@@ -483,27 +577,20 @@ def SS_create(nSeg , mSize , bRigdLnk):
                 sect_shape_arr.append(sect)
 
     for shape in sect_shape_arr:
-        sect_shape, sect_thk , sect_thk_off, sect_cg , sect_lin_con = Mesh_SHAPE(shape)
+        sect_shape, sect_thk , sect_thk_off, sect_cg , sect_lin_con = Mesh_SHAPE(shape,session=session)
         sect_points_arr.append(sect_shape)
         thk_arr.append(sect_thk)
         thk_off_arr.append(sect_thk_off)
         cg_arr.append(sect_cg)
         lin = sect_lin_con
 
-        
-    Node.sync()
-    Element.sync()
-    Thickness.sync()
-    Boundary.RigidLink.sync()
 
     myTapShape = plateTapSection(sect_points_arr,cg_arr,align_t_param,lin,thk_arr,thk_off_arr)
+    t = _lap(timings, 'sections', t)
 
-    createTapPlateAlign(fine_align_points,fine_t_param,fine_beta_angle,myTapShape,bRigdLnk,matID)
-
-    Node.create()
-    Element.create()
-    Thickness.create()
-    Boundary.RigidLink.create()
+    plates = createTapPlateAlign(fine_align_points,fine_t_param,fine_beta_angle,myTapShape,bRigdLnk,matID,session,beam_nodes=(node_list[0],node_list[-1]))
+    t = _lap(timings, 'plates', t)
+    return plates
 
 
 # SS_create(0,0.5,False)
@@ -1,46 +1,419 @@
 import math as mt
+import copy
 from midas_civil import *
-import matplotlib.pyplot as plt
 from scipy.interpolate import CubicHermiteSpline
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import weakref
+import time
+import json
+import hashlib
+import io
 import numpy as np
+from backend.centerline import PARTS, psc_centerline
 
 section_ids = []    #Global list of section IDs
-segment = {}
-array_1 = {}
 
 MAPI_KEY("")
 MAPI_BASEURL('')
 
-def MidasAPI(method, command, body=None):
+ID_CHUNK = 200    #Largest number of IDs sent in one /db/... URL
+
+#--------------------------------------------------------------------------------------------------------------------------
+#Pooled HTTP transport used by MidasAPI
+class MidasTransport:
+    """Keep-alive connection pool to the Civil NX endpoint.
+    base_url / mapi_key default to MAPI_BASEURL / MAPI_KEY when not given.
+    timeout = (connect, read) in seconds.  Only GET is retried (retries, backoff) as it is idempotent.
+    Sample: MidasTransport(timeout=(5, 120), retries=3).request("GET", "/db/NODE")"""
+
+    def __init__(self, base_url=None, mapi_key=None, timeout=(5, 120), retries=3, backoff=0.5, pool_size=10, history=500):
+        self.base_url = base_url
+        self.mapi_key = mapi_key
+        self.timeout = timeout
+        self.metrics = deque(maxlen=history)    #Latest calls : {method, command, status, elapsed}
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+                      status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, command, body=None):
+        """Send one request and return the parsed JSON (None if the body is not JSON)."""
+        base_url, mapi_key = self.scope()
+        headers = {
+            "Content-Type": "application/json",
+            "MAPI-Key": mapi_key
+        }
+        if method not in ["POST", "PUT", "GET", "DELETE"]:
+            raise ValueError(f"Unsupported HTTP method {method}")
+
+        start = time.perf_counter()
+        status = None
+        try:
+            if method == "GET" or method == "DELETE":
+                response = self.session.request(method, base_url + command, headers=headers, timeout=self.timeout)
+            else:
+                response = self.session.request(method, base_url + command, headers=headers, json=body, timeout=self.timeout)
+            status = response.status_code
+        finally:
+            self.metrics.append({"method": method, "command": command, "status": status, "elapsed": time.perf_counter() - start})
+
+        if response.status_code == 404: print(f"Civil NX model is not connected.  Click on 'Apps> Connect' in Civil NX. \nMake sure the MAPI Key in python code is matching with the MAPI key in Civil NX.")
+
+        if response.status_code != 200: print(method, command, response.status_code)
+
+        try:
+            return response.json()
+        except Exception as e:
+            print("Failed to parse JSON:", e)
+            return None
+
+    def scope(self):
+        """(base URL, MAPI key) identifying the connected model."""
+        base_url = self.base_url if self.base_url is not None else MAPI_BASEURL.baseURL
+        mapi_key = self.mapi_key if self.mapi_key is not None else MAPI_KEY.get_key()
+        return base_url, mapi_key
+
+    def get_many(self, commands, max_inflight=4):
+        """GET several independent commands concurrently, at most max_inflight at a time.  Results are in the order of commands."""
+        return run_concurrent([lambda c=c: self.request("GET", c) for c in commands], max_inflight)
+
+    def request_ids(self, method, command, ids, chunk_size=None, max_inflight=4):
+        """GET or DELETE a list of IDs of one table ("/db/ELEM", "/db/NODE" ...) in URLs of at most chunk_size IDs, sent concurrently.
+        Returns the table of all chunks merged in one dict {ID (str): data}.  Sample: request_ids("GET", "/db/NODE", [1,2,3])"""
+        ids = list(ids)
+        chunk_size = chunk_size or ID_CHUNK
+        table = command.rstrip("/").rsplit("/", 1)[-1]
+        chunks = [ids[i:i+chunk_size] for i in range(0, len(ids), chunk_size)]
+        merged = {}
+        for js in run_concurrent([lambda c=c: self.request(method, f"{command}/{','.join(map(str, c))}") for c in chunks], max_inflight):
+            if isinstance(js, dict) and isinstance(js.get(table), dict):
+                merged.update(js[table])
+        return merged
+
+    def stats(self):
+        """Summary of the recorded calls : count, total & max latency per method."""
+        summary = {}
+        for m in self.metrics:
+            s = summary.setdefault(m["method"], {"count": 0, "total": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["total"] += m["elapsed"]
+            s["max"] = max(s["max"], m["elapsed"])
+        return summary
+
+    def reset_metrics(self):
+        self.metrics.clear()
+
+    def close(self):
+        self.session.close()
+
+def run_concurrent(tasks, max_inflight=4):
+    """Run independent callables on a thread pool with at most max_inflight running at once.
+    Returns the results in the order of tasks.  The first exception raised by a task is re-raised."""
+    if len(tasks) <= 1 or max_inflight <= 1:
+        return [task() for task in tasks]
+    with ThreadPoolExecutor(max_workers=min(max_inflight, len(tasks))) as pool:
+        futures = [pool.submit(task) for task in tasks]
+        return [f.result() for f in futures]
+
+#--------------------------------------------------------------------------------------------------------------------------
+#Coincident node search in the model nodes, without loading them in midas_civil
+NODE_MERGE_TOL = 0.00001    #Merge distance of midas_civil (dist_tol), in model units
+
+class NodeIndex:
+    """Model node coordinates kept as arrays, finds the node a new point would merge with in midas_civil.
+    find() keeps only the nodes inside the bounding box of the points (one numpy pass) and hashes those in cells of tolerance size.
+    Sample: NodeIndex(MidasAPI("GET", "/db/NODE")["NODE"]).find([[0, 0, 0]])"""
+
+    def __init__(self, table=None, tolerance=NODE_MERGE_TOL):
+        self.tolerance = tolerance
+        table = table or {}
+        self.ids = np.fromiter(map(int, table), dtype=np.int64, count=len(table))
+        self.xyz = np.array([(v["X"], v["Y"], v["Z"]) for v in table.values()], dtype=float).reshape(-1, 3)
+
+    def find(self, points):
+        """ID of the model node within tolerance of each point (rounded to 6 decimals like midas_civil), 0 where there is none."""
+        pts = np.round(np.asarray(points, dtype=float).reshape(-1, 3), 6)
+        if len(pts) == 0 or len(self.ids) == 0:
+            return [0]*len(pts)
+        inside = np.flatnonzero(np.all((self.xyz >= pts.min(axis=0)-self.tolerance) & (self.xyz <= pts.max(axis=0)+self.tolerance), axis=1))
+        cells = {}    #cell : [(ID, (x, y, z))] of the nodes in the bounding box
+        for nid, cell, q in zip(self.ids[inside].tolist(), np.floor(self.xyz[inside]/self.tolerance).astype(np.int64).tolist(), self.xyz[inside].tolist()):
+            cells.setdefault(tuple(cell), []).append((nid, q))
+        found = []
+        for p, c in zip(pts.tolist(), np.floor(pts/self.tolerance).astype(np.int64).tolist()):
+            nid = 0
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        for i, q in cells.get((c[0]+dx, c[1]+dy, c[2]+dz), ()):
+                            if nid == 0 and mt.hypot(p[0]-q[0], p[1]-q[1], p[2]-q[2]) < self.tolerance:
+                                nid = i
+            found.append(nid)
+        return found
+
+#--------------------------------------------------------------------------------------------------------------------------
+#IDs for new nodes, elements & thicknesses without loading the existing model
+class IdAllocator:
+    """Next free ID of the NODE, ELEM & THIK tables of the connected model.
+    refresh() reads the tables concurrently and keeps only the largest ID (the API has no max ID query), no Node / Element
+    object is built for the existing model.  IDs of uploads of the model not done yet are skipped.  Only the max ID is kept of ELEM, the node coordinates
+    (NodeIndex arrays, nodes) & THIK rows are kept until release() so new nodes can reuse coincident model nodes.  take() then reserves blocks of IDs locally.
+    Sample: first = IdAllocator(session).refresh().take("NODE", 100)"""
+    COMMANDS = {"NODE": "/db/NODE", "ELEM": "/db/ELEM", "THIK": "/db/THIK"}
+
+    def __init__(self, session):
+        self.session = session
+        self.next = {}    #table : next free ID
+        self.nodes = None    #NodeIndex of the model nodes, read with NODE
+        self.thik = None    #/db/THIK table read with THIK, seeds the ThicknessRegistry without a second read
+        self._lock = threading.Lock()
+
+    def refresh(self, tables=None):
+        """Read the tables.  Raises RuntimeError when one of them can not be read, numbering from 1 would overwrite the model."""
+        tables = tables or list(IdAllocator.COMMANDS)
+        replies = self.session.transport.get_many([IdAllocator.COMMANDS[t] for t in tables])
+        rows = {}
+        for t, js in zip(tables, replies):
+            if js == {'message': ''}:
+                rows[t] = {}    #Empty table
+            elif isinstance(js, dict) and isinstance(js.get(t), dict):
+                rows[t] = js[t]
+            else:
+                raise RuntimeError(f"{IdAllocator.COMMANDS[t]} could not be read ({js}), new IDs can not be allocated.")
+        with self._lock:
+            scope = self.session.scope()
+            for t in tables:
+                self.next[t] = max(max(map(int, rows[t]), default=0), MeshUpload.reserved(scope, t)) + 1
+            if "NODE" in rows:
+                self.nodes = NodeIndex(rows["NODE"])
+            if "THIK" in rows:
+                self.thik = rows["THIK"]
+        return self
+
+    def take(self, table, count=1):
+        """First of count new IDs of the table, 0 (auto ID of midas_civil) when the table has not been read."""
+        with self._lock:
+            if table not in self.next: return 0
+            first = self.next[table]
+            self.next[table] += count
+            return first
+
+    def release(self):
+        """Drop the node coordinates & the THIK table once the mesh is built, the next free IDs are kept."""
+        with self._lock:
+            self.nodes = None
+            self.thik = None
+
+    def reset(self):
+        with self._lock:
+            self.next = {}
+            self.nodes = None
+            self.thik = None
+
+#--------------------------------------------------------------------------------------------------------------------------
+#Plate thicknesses of the connected model, shared between runs
+THICK_TOL = 0.01    #Thicknesses & offsets are rounded to multiples of this length (in M) before they get an ID
+
+class ThicknessRegistry:
+    """Thickness ID of (thickness, offset) pairs, keyed by the pair rounded to tolerance (M, converted to the model unit).
+    seed() reads /db/THIK so value thicknesses already in the model are reused, new pairs are created with an ID from session.ids.
+    Sample: ids = session.thicknesses.assign(thk_plate, thk_plate_off)"""
+
+    def __init__(self, session, tolerance=None):
+        self.session = session
+        self.tolerance = THICK_TOL if tolerance is None else tolerance
+        self.ids = {}    #(thickness, offset) in tolerance steps : Thickness ID
+        self._lock = threading.Lock()
+
+    def _step(self):
+        return self.tolerance / model_length_factor(self.session) if self.tolerance else 0
+
+    def _keys(self, thick, offset, step):
+        pairs = np.column_stack([np.ravel(thick), np.ravel(offset)]).astype(float)
+        return np.rint(pairs/step).astype(np.int64) if step else pairs
+
+    def seed(self, thik_json=None):
+        """Replace the registry with the model thicknesses (TYPE VALUE, same thickness in & out, offset as a value or none).
+        The lowest ID is kept when several model thicknesses round to the same pair."""
+        if thik_json is None:
+            thik_json = _transport(self.session).request("GET", "/db/THIK")
+        table = thik_json.get("THIK") if isinstance(thik_json, dict) else None
+        rows = [(int(k), v) for k, v in (table or {}).items()
+                if v.get("TYPE") == "VALUE" and not v.get("bINOUT") and v.get("OFFSET", 0) in (0, 2)]
+        rows.sort(key=lambda r: r[0])
+        step = self._step()
+        ids = {}
+        if rows:
+            thick = [v["T_IN"] for _, v in rows]
+            offset = [v.get("O_VALUE", 0) if v.get("OFFSET", 0) else 0 for _, v in rows]
+            for key, (tid, _) in zip(map(tuple, self._keys(thick, offset, step).tolist()), rows):
+                ids.setdefault(key, tid)
+        with self._lock:
+            self.ids = ids
+        return self
+
+    def assign(self, thick, offset):
+        """Thickness ID of every (thick[i], offset[i]).  One np.unique pass, new pairs are created in order of first appearance."""
+        step = self._step()
+        uniq, first, inv = np.unique(self._keys(thick, offset, step), axis=0, return_index=True, return_inverse=True)
+        out = np.zeros(len(uniq), dtype=int)
+        with self._lock:
+            for u in np.argsort(first):
+                key = tuple(uniq[u].tolist())
+                if key not in self.ids:
+                    t, off = (round(k*step, 10) for k in key) if step else key
+                    self.ids[key] = Thickness(t, offset=off, off_type='val', id=self.session.ids.take("THIK")).ID
+                out[u] = self.ids[key]
+        return out[np.ravel(inv)]
+
+    def clear(self):
+        with self._lock:
+            self.ids = {}
+
+#--------------------------------------------------------------------------------------------------------------------------
+#Per-user state, so one process can serve several users / models at once
+class MidasSession:
+    """Connection and working state of one user : its own transport (base URL + MAPI key), the thickness registry
+    and the ID allocator of its model.
+    Pass it as session= to MidasAPI, PSC_1CEL_XY, SS_create ...  Without a session the default one is used,
+    which follows MAPI_BASEURL / MAPI_KEY.
+    Sample: session = MidasSession("https://moa-engineers.midasit.com:443/civil", "key")"""
+
+    def __init__(self, base_url=None, mapi_key=None, **transport_options):
+        self.transport = MidasTransport(base_url, mapi_key, **transport_options)
+        self.ids = IdAllocator(self)
+        self.thicknesses = ThicknessRegistry(self)
+        self.upload = None    #Last MeshUpload, kept to resume it after a failed upload
+
+    def scope(self):
+        return self.transport.scope()
+
+    def activate(self):
+        """Point the midas_civil library (process wide MAPI_BASEURL / MAPI_KEY) to this session.  Call it holding mesh_lock."""
+        base_url, mapi_key = self.scope()
+        MAPI_BASEURL(base_url)
+        MAPI_KEY(mapi_key)
+
+    def close(self):
+        """Close the transport, the IDs of an unfinished upload are no longer reserved."""
+        if self.upload is not None:
+            self.upload.discard()
+            self.upload = None
+        self.transport.close()
+
+# midas_civil keeps the model being built (Node, Element, Thickness, RigidLink ...) in class attributes,
+# so building and sending a mesh is done by one session at a time
+mesh_lock = threading.RLock()
+# Cached figures are shared by the sessions and Agg drawing is not thread safe
+figure_lock = threading.RLock()
+
+_model_locks = {}    #(base URL, MAPI key) : lock of that model
+_model_locks_guard = threading.Lock()
+
+def model_lock(scope):
+    """Lock of one model (session.scope()), held from reading its free IDs until the mesh built on them is uploaded,
+    so two sessions on the same model never number their meshes from the same maxima."""
+    with _model_locks_guard:
+        return _model_locks.setdefault(tuple(scope), threading.RLock())
+
+default_session = MidasSession()
+transport = default_session.transport    #Default transport shared by all MidasAPI calls without a session
+
+def _transport(session=None):
+    return (session or default_session).transport
+
+def MidasAPI(method, command, body=None, session=None):
     """Method, Command, Body.  Sample: MidasAPI("PUT","/db/NODE",{"Assign":{1{'X':0, 'Y':0, 'Z':0}}})"""
-    base_url = MAPI_BASEURL.baseURL
-    mapi_key = MAPI_KEY.get_key()
+    return _transport(session).request(method, command, body)
 
-    url = base_url + command
-    headers = {
-        "Content-Type": "application/json",
-        "MAPI-Key": mapi_key
-    }
+def MidasAPI_batch(commands, max_inflight=4, session=None):
+    """List of GET commands, sent concurrently.  Sample: MidasAPI_batch(["/db/SECT", "/ope/SECTPROP"])"""
+    return _transport(session).get_many(commands, max_inflight)
 
-    if method == "POST":
-        response = requests.post(url=url, headers=headers, json=body)
-    elif method == "PUT":
-        response = requests.put(url=url, headers=headers, json=body)
-    elif method == "GET":
-        response = requests.get(url=url, headers=headers)
-    elif method == "DELETE":
-        response = requests.delete(url=url, headers=headers)
+def MidasAPI_ids(method, command, ids, chunk_size=None, max_inflight=4, session=None):
+    """GET / DELETE of a list of IDs, chunked to ID_CHUNK IDs per URL and sent concurrently.  Returns {ID (str): data} of all chunks.
+    Sample: MidasAPI_ids("GET", "/db/ELEM", range(1, 1001))"""
+    return _transport(session).request_ids(method, command, ids, chunk_size, max_inflight)
 
-    if response.status_code == 404: print(f"Civil NX model is not connected.  Click on 'Apps> Connect' in Civil NX. \nMake sure the MAPI Key in python code is matching with the MAPI key in Civil NX.")
+#--------------------------------------------------------------------------------------------------------------------------
+#Upload of a generated mesh in bounded PUT bodies
+UPLOAD_CHUNK = 5000    #Largest number of entities sent in one PUT body
 
-    if response.status_code != 200: print(method, command, response.status_code)
+class MeshUpload:
+    """PUT of {table: {"Assign": {ID: data}}} bodies in chunks of at most chunk_size entities, table after table in
+    dependency order (THIK, NODE, ELEM, RIGD).  A chunk is acknowledged when Civil NX answers with its table,
+    run() again after a failure only sends the chunks not acknowledged yet.
+    progress(table, sent, total) is called after each acknowledged chunk, sent & total count the entities of all tables.
+    Until it is done, its NODE / ELEM / THIK IDs stay reserved for its model (reserved()), IdAllocator skips them.
+    The reservation is weak : it expires when the upload is discarded or no longer referenced (its session closed or gone).
+    Sample: MeshUpload({"NODE": Node.json(), "ELEM": plates}, session=session).run(progress=print)"""
+    ORDER = ["THIK", "NODE", "ELEM", "RIGD"]
+    pending = {}    #Model scope : WeakSet of the uploads not done yet
+    _pending_lock = threading.Lock()
 
-    try:
-        return response.json()
-    except Exception as e:
-        print("Failed to parse JSON:", e)
-        return None
+    def __init__(self, bodies, chunk_size=None, session=None):
+        self.session = session
+        self.scope = tuple(_transport(session).scope())
+        chunk_size = chunk_size or UPLOAD_CHUNK
+        self.chunks = []    #(table, body) in upload order
+        self.max_ids = {}    #table : largest ID sent
+        for table in MeshUpload.ORDER:
+            items = list(bodies.get(table, {}).get("Assign", {}).items())
+            if items: self.max_ids[table] = max(int(k) for k, _ in items)
+            for i in range(0, len(items), chunk_size):
+                self.chunks.append((table, {"Assign": dict(items[i:i+chunk_size])}))
+        self.acked = set()    #Index of the acknowledged chunks
+        self.total = sum(len(body["Assign"]) for _, body in self.chunks)
+        self._pending(True)
+
+    def _pending(self, add):
+        with MeshUpload._pending_lock:
+            uploads = MeshUpload.pending.setdefault(self.scope, weakref.WeakSet())
+            if add: uploads.add(self)
+            else: uploads.discard(self)
+            for scope in [k for k, v in MeshUpload.pending.items() if not v]:
+                del MeshUpload.pending[scope]
+
+    def discard(self):
+        """Give up the remaining chunks, their IDs are no longer reserved."""
+        self._pending(False)
+
+    @classmethod
+    def reserved(cls, scope, table):
+        """Largest ID of the table in the uploads of the model that are not done yet, 0 if none."""
+        with cls._pending_lock:
+            return max((u.max_ids.get(table, 0) for u in list(cls.pending.get(tuple(scope), ()))), default=0)
+
+    @property
+    def sent(self):
+        return sum(len(self.chunks[i][1]["Assign"]) for i in self.acked)
+
+    @property
+    def done(self):
+        return len(self.acked) == len(self.chunks)
+
+    def run(self, progress=None):
+        """Send the remaining chunks.  Raises RuntimeError on the first chunk not accepted, the next run() resumes from it."""
+        via = _transport(self.session)
+        for i, (table, body) in enumerate(self.chunks):
+            if i in self.acked: continue
+            js = via.request("PUT", f"/db/{table}", body)
+            if not (isinstance(js, dict) and table in js):
+                raise RuntimeError(f"Upload stopped at {table} chunk {i+1} of {len(self.chunks)}, {self.sent} of {self.total} entities sent.  Run it again to resume.")
+            self.acked.add(i)
+            if progress: progress(table, self.sent, self.total)
+        self._pending(False)
+        return self
 
 
 def units(force = "KN",length = "M", heat = "BTU", temp = "C"):
@@ -67,6 +440,69 @@ def units(force = "KN",length = "M", heat = "BTU", temp = "C"):
     }}
     MidasAPI("PUT","/db/UNIT",unit)
 
+#--------------------------------------------------------------------------------------------------------------------------
+#In-process cache of the section tables of the connected model
+_LENGTH_TO_M = {"M": 1, "CM": 0.01, "MM": 0.001, "FT": 0.3048, "IN": 0.0254}
+
+def _unit_to_m(unit_json):
+    """Metres per length unit of a /db/UNIT response."""
+    try:
+        return _LENGTH_TO_M[unit_json['UNIT']['1']['DIST']]
+    except (KeyError, TypeError):
+        print("Unit system of the connected model could not be read, M is assumed.")
+        return 1
+
+class SectionCache:
+    """Caches /db/SECT, /ope/SECTPROP and /db/UNIT per model (base URL + MAPI key) for ttl seconds.
+    Tables are kept in the model units together with the length unit they were read in, the model units are never changed.
+    Call invalidate() after the sections are edited in Civil NX.
+    Sample: section_cache.get("SECT")['SECT']['1']"""
+    COMMANDS = {"SECT": "/db/SECT", "SECTPROP": "/ope/SECTPROP", "UNIT": "/db/UNIT"}
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._store = {}    #(base_url, mapi_key, table) : (time of read, json, metres per length unit)
+        self._lock = threading.Lock()
+
+    def get(self, table, via=None):
+        return self.get_many([table], via)[0]
+
+    def get_many(self, tables, via=None):
+        return [js for js, to_m in self.fetch(tables, via)]
+
+    def fetch(self, tables, via=None, refresh=False):
+        """[(json, metres per length unit)] of the tables.  Missing or expired ones are read together with /db/UNIT
+        in one concurrent round trip.  via = MidasTransport (default transport).  refresh = True reads all of them again."""
+        via = via or _transport()
+        scope = via.scope()
+        now = time.monotonic()
+        with self._lock:
+            hits = {t: self._store.get(scope + (t,)) for t in tables}
+        missing = [t for t, hit in hits.items() if refresh or hit is None or now - hit[0] > self.ttl]
+        if missing:
+            batch = missing if "UNIT" in missing else missing + ["UNIT"]
+            fetched = dict(zip(batch, via.get_many([SectionCache.COMMANDS[t] for t in batch])))
+            to_m = _unit_to_m(fetched["UNIT"])
+            with self._lock:
+                for t, js in fetched.items():
+                    if js and t in js:
+                        self._store[scope + (t,)] = (now, js, to_m)
+                    hits[t] = (now, js, to_m)
+        return [(hits[t][1], hits[t][2]) for t in tables]
+
+    def invalidate(self, base_url=None, mapi_key=None):
+        """Drop the cached tables of one model, or of every model when nothing is given."""
+        with self._lock:
+            for k in list(self._store):
+                if (base_url is None or k[0] == base_url) and (mapi_key is None or k[1] == mapi_key):
+                    del self._store[k]
+
+section_cache = SectionCache()
+
+def model_length_factor(session=None):
+    """Metres per length unit of the connected model (read once, cached with the section tables)."""
+    return section_cache.fetch(["UNIT"], _transport(session))[0][1]
+
 #Function to check analysis status & perform analysis if not analyzed
 def analyze():
     """Checkes whether a model is analyzed or not and then performs analysis if required."""
@@ -76,63 +512,95 @@ def analyze():
         MidasAPI("POST","/doc/ANAL",{"Assign":{}})
 #--------------------------------------------------------------------------------------------------------------------------
 #Function to remove duplicate nodes and elements from Node & Element classes
+_MIN_NODES = {"PLATE": 3, "SOLID": 4}    #Distinct nodes an element needs, 2 when not listed
+
+def merge_nodes(xyz, tolerance = 0):
+    """Coordinates (n,3) -> index of the node each one is merged into (n,).  Nodes closer than tolerance along every axis
+    (chained) are merged into the first of them, found with a KD-tree (tolerance = 0 merges identical coordinates only)."""
+    xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    n = len(xyz)
+    if n == 0: return np.zeros(0, dtype=int)
+    if tolerance > 0:
+        pairs = cKDTree(xyz).query_pairs(tolerance, p=np.inf, output_type='ndarray')
+        graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        label = connected_components(graph, directed=False)[1]
+    else:
+        label = np.unique(xyz, axis=0, return_inverse=True)[1].ravel()
+    first = np.full(label.max()+1, n)
+    np.minimum.at(first, label, np.arange(n))
+    return first[label]
+
+def dedupe_mesh(node_di, elem_di, tolerance = 0, merge = True, clean = True):
+    """Node {ID: {'X','Y','Z'}} & element {ID: {'TYPE','NODE',...}} assign dicts -> (nodes, elements, merged {ID: kept ID}, removed element IDs).
+    merge = True merges coincident nodes & remaps the element nodes, clean = True drops degenerate & duplicate elements
+    and turns plates left on 3 distinct nodes into triangles.
+    Near linear : KD-tree for the nodes, one lookup table for the connectivity, np.unique for the duplicates."""
+    nids = np.array([int(i) for i in node_di], dtype=np.int64)
+    merged = {}
+    lut = np.arange(nids.max()+1 if len(nids) else 1, dtype=np.int64)
+    if merge and len(nids):
+        keep = merge_nodes([[v['X'], v['Y'], v['Z']] for v in node_di.values()], tolerance)
+        lut[nids] = nids[keep]
+        dup = np.flatnonzero(keep != np.arange(len(nids)))
+        merged = dict(zip(nids[dup].tolist(), nids[keep[dup]].tolist()))
+    nodes = {k: v for k, v in node_di.items() if int(k) not in merged}
+
+    eids = list(elem_di)
+    width = max([len(e['NODE']) for e in elem_di.values()] + [1])
+    conn = np.zeros((len(eids), width), dtype=np.int64)
+    for r, e in enumerate(elem_di.values()):
+        conn[r, :len(e['NODE'])] = e['NODE']
+    inside = conn < len(lut)
+    conn = np.where(inside, lut[np.where(inside, conn, 0)], conn)
+
+    drop = np.zeros(len(eids), dtype=bool)
+    count = np.array([len(e['NODE']) for e in elem_di.values()], dtype=int)
+    if clean and len(eids):
+        srt = np.sort(conn, axis=1)
+        distinct = (srt[:, 0] != 0).astype(int) + ((srt[:, 1:] != srt[:, :-1]) & (srt[:, 1:] != 0)).sum(axis=1)
+        types = [e.get('TYPE', '') for e in elem_di.values()]
+        need = np.array([_MIN_NODES.get(t, 2) for t in types])
+        drop = distinct < need
+        # Quad plate on 3 distinct nodes becomes a triangle (same rule as _platePayload of finalUIfunc)
+        for r in np.flatnonzero(~drop & (distinct < count) & (np.array(types) == "PLATE")):
+            tri = list(dict.fromkeys(conn[r, :count[r]].tolist()))
+            conn[r] = 0
+            conn[r, :len(tri)] = tri
+            count[r] = len(tri)
+        srt = np.sort(conn, axis=1)
+        # Same type on the same set of nodes : only the first one is kept
+        tcode = np.unique(types, return_inverse=True)[1].reshape(-1, 1)
+        first = np.unique(np.hstack([tcode, srt]), axis=0, return_index=True)[1]
+        dup = np.ones(len(eids), dtype=bool)
+        dup[first] = False
+        drop |= dup
+
+    elements, removed = {}, []
+    for r, (k, e) in enumerate(elem_di.items()):
+        if drop[r]:
+            removed.append(k)
+        else:
+            elements[k] = dict(e, NODE=conn[r, :count[r]].tolist())
+    return nodes, elements, merged, removed
+
 def remove_duplicate(node_dict="", elem_dict="", tolerance = 0):
-    """This functions removes duplicate nodes defined in the Node Class and modifies Element class accordingly.  \nSample: remove_duplicate()"""
-    a=[]
-    b=[]
-    node_json = Node.make_json()
-    elem_json = Element.make_json()
-    node_di = node_json["Assign"]
-    elem_di = elem_json["Assign"]
-    if node_dict != "NA":
-        for i in list(node_di.keys()):
-            for j in list(node_di.keys()):
-                if list(node_di.keys()).index(j) > list(node_di.keys()).index(i):
-                    if (node_di[i]["X"] >= node_di[j]["X"] - tolerance and node_di[i]["X"] <= node_di[j]["X"] + tolerance):
-                        if (node_di[i]["Y"] >= node_di[j]["Y"] - tolerance and node_di[i]["Y"] <= node_di[j]["Y"] + tolerance):
-                            if (node_di[i]["Z"] >= node_di[j]["Z"] - tolerance and node_di[i]["Z"] <= node_di[j]["Z"] + tolerance):
-                                a.append(i)
-                                b.append(j)
-        for i in range(len(a)):
-            for j in range(len(b)):
-                if a[i] == b[j]: 
-                    a[i] = a[j]
-                    for k in elem_di.keys():
-                        for i in range(len(a)):
-                            if elem_di[k]['NODE'][0] == b[i]: elem_di[k]['NODE'][0] = a[i]
-                            if elem_di[k]['NODE'][1] == b[i]: elem_di[k]['NODE'][1] = a[i]
-        if len(b)>0:
-            for i in range(len(b)):
-                if b[i] in node_di: del node_di[b[i]]
-            Node.nodes = []
-            Node.ids = []
-            for i in node_di.keys():
-                Node(node_di[i]['X'], node_di[i]['Y'], node_di[i]['Z'], i)
-            Element.elements = []
-            Element.ids = []
-            for i in elem_di.keys():
-                Element(elem_di[i]['NODE'][0], elem_di[i]['NODE'][1], elem_di[i]['MATL'], elem_di[i]['SECT'], elem_di[i]['TYPE'], elem_di[i]['ANGLE'], i)
-    if elem_di!="" and elem_dict != "NA": 
-        for i in b:
-            if len(b)>0:
-                for j in list(elem_di.keys()):
-                    if elem_di[j]['NODE'][0]==i:
-                        elem_di[j]['NODE'][0]=a[b.index(i)]
-                    if elem_di[j]['NODE'][1]==i:
-                        elem_di[j]['NODE'][1]=a[b.index(i)]
-        c=[]
-        for i in list(elem_di.keys()):
-            for j in list(elem_di.keys()):
-                if list(elem_di.keys()).index(j) > list(elem_di.keys()).index(i):
-                    if ((elem_di[i]['NODE'][0] == elem_di[j]['NODE'][0] and elem_di[i]['NODE'][1] == elem_di[j]['NODE'][1]) or (elem_di[i]['NODE'][0] == elem_di[j]['NODE'][1] and elem_di[i]['NODE'][1] == elem_di[j]['NODE'][0])):
-                        c.append(j)
-        if len(c)>0:
-            for i in c:
-                del elem_di[i]
-            Element.elements = []
-            Element.ids = []
-            for i in elem_di.keys():
-                Element(elem_di[i]['NODE'][0], elem_di[i]['NODE'][1], elem_di[i]['MATL'], elem_di[i]['SECT'], elem_di[i]['TYPE'], elem_di[i]['ANGLE'], i)
+    """This functions removes duplicate nodes defined in the Node Class and modifies Element class accordingly.  \nSample: remove_duplicate()
+    node_dict = "NA" skips merging the nodes, elem_dict = "NA" skips removing degenerate / duplicate elements.
+    Returns (merged {node ID: kept node ID}, removed element IDs)."""
+    node_di = Node.json()["Assign"]
+    elem_di = Element.json()["Assign"]
+    nodes, elements, merged, removed = dedupe_mesh(node_di, elem_di, tolerance, node_dict != "NA", elem_dict != "NA")
+    if merged:
+        Node.clear()
+        for i, v in nodes.items():
+            Node(v['X'], v['Y'], v['Z'], int(i))
+    # Element objects are kept, only their nodes are updated and the removed ones dropped
+    for e in Element.elements:
+        if e.ID in elements:
+            e.NODE = elements[e.ID]['NODE']
+    for i in removed:
+        Element._deleteElem(int(i))
+    return merged, removed
 #--------------------------------------------------------------------------------------------------------------------------
 #Class to define PSC 1-CELL, 2-CELL & Half Sections
 class PSC_BOX:
@@ -331,12 +799,11 @@ class PSC_BOX:
                         v['SECT_BEFORE']['WEB_THICK'][0], v['SECT_BEFORE']['USE_SYMMETRIC'], v['SECT_BEFORE']['USE_SMALL_HOLE'], v['SECT_BEFORE']['USE_USER_DEF_MESHSIZE'],
                         v['SECT_BEFORE']['USE_USER_INTPUT_STIFF'], v['SECT_BEFORE']['PSC_OPT1'], v['SECT_BEFORE']['PSC_OPT2'])
 
-def sect_prop(id=[]):
-    """List of section ID.  Sample: Enter Sect_prop[3,4] for properties of section ID 4 & 5.  
-    Enter sect_prop() for properties of all defined sections."""
+_SECTPROP_DIM = {"Area":2, "Iy":4, "Iz":4}   #Length power of the section properties, 1 when not listed
+
+def _sect_prop_table(sect, id=[], length_scale=1):
+    """Section properties of the IDs from a /ope/SECTPROP response.  Lengths are multiplied by length_scale."""
     dir = {}
-    units("N",length="MM")
-    sect = MidasAPI("GET","/ope/SECTPROP")
     if id == []: a = list(sect['SECTPROP'].keys())
     if (id != [] and type(id)!= int): a = [str(e) for e in id]
     if type(id) == int: a = [str(id)]
@@ -348,613 +815,162 @@ def sect_prop(id=[]):
             for j in list(range(4,10))+list(range(16,24)):
                 data.append(float(sect['SECTPROP'][i]['DATA'][j][1]))
             for idx, key in enumerate(dir[int(i)]):
-                dir[int(i)][key] = data[idx]
+                dir[int(i)][key] = data[idx] * length_scale**_SECTPROP_DIM.get(key, 1)
         elif i not in sect['SECTPROP'].keys(): print ("Section id", i, "is not defined in connected model.")
-    units()
     return(dir)
+
+def sect_prop(id=[], session=None):
+    """List of section ID.  Sample: Enter Sect_prop[3,4] for properties of section ID 4 & 5.  
+    Enter sect_prop() for properties of all defined sections.  Lengths are in MM."""
+    sect, to_m = section_cache.fetch(["SECTPROP"], _transport(session))[0]
+    return _sect_prop_table(sect, id, length_scale=to_m*1000)
 #---------------------------------------------------------------------------------------------------------------------------
 #Function to get section inputs of the specific ID
-def sect_inp(sec):
-    """Section ID.  Enter one section id or list of section IDs.  Sample:  sect_inp(1) OR sect_inp([3,2,5])"""
-    units()
-    a = MidasAPI("GET","/db/SECT",{"Assign":{}})
+def _sect_to_m(data, to_m):
+    """Copy of a /db/SECT entry with the section dimension lists (vSIZE*, SWIDTH) converted to M."""
+    if to_m == 1: return data
+    data = copy.deepcopy(data)
+    for side in ['SECT_I', 'SECT_J']:
+        dims = data.get('SECT_BEFORE', {}).get(side)
+        if not isinstance(dims, dict): continue
+        for key, val in dims.items():
+            if key.startswith('vSIZE') and isinstance(val, list):
+                dims[key] = [v*to_m for v in val]
+            elif key == 'SWIDTH':
+                dims[key] = val*to_m
+    return data
+
+def _sect_inp_table(a, sec, to_m=1):
+    """Section inputs of the IDs from a /db/SECT response.  Dimensions are converted to M with to_m (metres per model unit)."""
     if type(sec)==int: sec = [sec]
     b={}
     for s in sec:
-        if str(s) in a['SECT'].keys() : b.update({s : a['SECT'][str(s)]})
+        if str(s) in a['SECT'].keys() : b.update({s : _sect_to_m(a['SECT'][str(s)], to_m)})
     # if elem = [0] and sec!=0: b.update({sec : })
     if b == {}: b = "The required section ID is not defined in connected model file."
     return(b)
-#---------------------------------------------------------------------------------------------------------------------------
-#Function to remove duplicate set of values from 2 lists
-def unique_lists(li1, li2):
-    if type (li1) == list and type (li2) == list:
-        if len(li1) == len(li2):
-            indices_to_remove = []
-            for i in range(len(li1)):
-                for j in range(i+1,len(li1)):
-                    if li1[i] == li1[j] and li2[i] == li2[j]:
-                        indices_to_remove.append(j)
-            for index in sorted(indices_to_remove, reverse = True):
-                del li1[index]
-                del li2[index]
+
+def sect_inp(sec, session=None):
+    """Section ID.  Enter one section id or list of section IDs.  Sample:  sect_inp(1) OR sect_inp([3,2,5])
+    Section dimensions are returned in M whatever the unit system of the model."""
+    a, to_m = section_cache.fetch(["SECT"], _transport(session))[0]
+    return _sect_inp_table(a, sec, to_m)
 #---------------------------------------------------------------------------------------------------------------------------
 #Function to get centerline of the cross-section PSC 1-Cell & 2-Cell
-def PSC_1CEL_XY(sec, offset = "CC"):
-    """INCOMPLETE.  Section ID.  Sample:  PSC_1CEL(3)."""
-    
-    global segment 
-    # segment ={}
-    if type(sec) == int:
-        inp = sect_inp(sec)
-        prop = sect_prop(sec)
-        if inp[sec]['SECTTYPE'] == 'PSC' and inp[sec]['SECT_BEFORE']['SHAPE'][-3:] == 'CEL':
-            oh = inp[sec]['SECT_BEFORE']['SECT_I']['vSIZE_PSC_A']
-            ob = inp[sec]['SECT_BEFORE']['SECT_I']['vSIZE_PSC_B']
-            ih = inp[sec]['SECT_BEFORE']['SECT_I']['vSIZE_PSC_C']
-            ib = inp[sec]['SECT_BEFORE']['SECT_I']['vSIZE_PSC_D']
-            oht = oh[0] + oh[1] + oh[4]
-            iht = ih[0] + ih[1] + ih[4] + ih[6] + ih[9]
-            diff_ht = oht - iht
-            if oht > iht: 
-                y0 = (prop[sec]['Zt']/1000 - diff_ht)   #y0
-            else:
-                y0 = (prop[sec]['Zt']/1000)             #y0
-            x0 = (0)                                    #x0
-            x1 = (ob[0] + ob[3] + ob[5])                #x1
-            y1 = (y0 + diff_ht)                         #y1
-            x2 = (x1)                                   #x2
-            y2 = (y1 - oh[0])                           #y2
-            x3 = (x1 - ob[1])                           #x3
-            y3 = (y2 - oh[2])                           #y3
-            x4 = (x3 - max(0, ob[2]-ob[1]))             #x4
-            y4 = (y2 - oh[3])                           #y4
-            x5 = (x1 - ob[0])                           #x5
-            y5 = (y2 - oh[1])                           #y5
-            x6 = (x5 - ob[3] + ob[4])                   #x6
-            y6 = (y5 - oh[4] + oh[5])                   #y6
-            x7 = (ob[5])                                #x7
-            y7 = (y6 - oh[5])                           #y7
-            x8 = (0)                                    #x8
-            y8 = (y7)                                   #y8
-            external = []
-            x = [x0, x1, x2, x3, x4, x5, x6, x7, x8]
-            y = [y0, y1, y2, y3, y4, y5, y6, y7, y8]
-            for i in range(len(x)): external.append((x[i],y[i]))
-            x_1 = [-a for a in x]
-            x_1.reverse()
-            x = x + x_1
-            y.extend(reversed(y))
-            if oht > iht: 
-                y0 = (prop[sec]['Zt']/1000 - diff_ht - ih[0])   #iy0
-            else:
-                y0 = (prop[sec]['Zt']/1000 - ih[0])             #iy0
-            if inp[sec]['SECT_BEFORE']['SHAPE'] == '1CEL':
-                x0 = (0)                                        #ix0
-            else:
-                x0 = ib[7]                                      #ix0
-            y1 = (y0 - ih[2])                                   #iy1
-            x1 = (x0 + ib[1])                                   #ix1
-            y2 = (y1 + max(0, ih[3] - ih[2]))                   #iy2
-            x2 = (x1 + max(0, ib[2] - ib[1]))                   #ix2
-            y3 = (y0 - ih[1])                                   #iy3
-            x3 = (ib[0])                                        #ix3
-            y4 = (y3 - ih[5])                                   #iy4
-            x4 = (ib[3])                                        #ix4
-            y5 = (y0 - ih[1] - ih[4])                           #iy5
-            x5 = (ib[4])                                        #ix5
-            y8 = y5 - ih[6]                                     #iy8
-            x8 = x0                                             #ix8
-            y7 = y8 + ih[7]                                     #iy7
-            x7 = ib[5]                                          #ix7
-            y6 = y8 + max(ih[7], ih[8])                         #iy6
-            x6 = max (ib[5], ib[6])                             #ix6
-            internal = []
-            ix = [x0, x1, x2, x3, x4, x5, x6, x7, x8]
-            iy = [y0, y1, y2, y3, y4, y5, y6, y7, y8]
-            for i in range(len(ix)): internal.append((ix[i],iy[i]))
-            ix_1 = [-a for a in ix]
-            ix_1.reverse()
-            unique_lists(x, y)
-            x.append(x[0])
-            y.append(y[0])
-            if inp[sec]['SECT_BEFORE']['SHAPE'] == '1CEL':
-                ix = ix + ix_1
-                iy.extend(reversed(iy))
-            else:
-                iy_1 = iy[::-1]
-                unique_lists(ix_1, iy_1)
-                ix_1.append(ix_1[0])
-                iy_1.append(iy_1[0])
-            unique_lists(ix, iy)
-            ix.append(ix[0])
-            iy.append(iy[0])
-    if inp[sec]['SECT_BEFORE']['SHAPE'] == '1CEL':
-        a = x, y, ix, iy
-    else:
-        a =  x, y, ix, iy, ix_1, iy_1
-    
-    def perpendicular_point(x1, y1, x2, y2, x3, y3, l=0):
-        """Function to get orthogonal point on line (x1,y1)-(x2,y2) from point (x3,y3). Enter l=0 for point 3 in between 1 & 2.  Enter l=1 for other scenario."""
-        if x2 != x1:
-            m = (y2 - y1) / (x2 - x1)
-            c = y1 - m * x1
-            x_perp = (x3 + m * (y3 - c)) / (1 + m**2)
-            y_perp = m * x_perp + c
-        else:
-            x_perp, y_perp = x1, y3
-        
-        l1 = ((x_perp - x1)**2 + (y_perp - y1)**2)**0.5
-        l2 = ((x_perp - x2)**2 + (y_perp - y2)**2)**0.5
-        l3 = ((x2 - x1)**2 + (y2 - y1)**2)**0.5
-        thk = ((x3 - x_perp)**2 + (y3 - y_perp)**2)**0.5
-        if round(l1 + l2,5) == round(l3,5) and l == 0:
-            return x_perp, y_perp, thk
-        elif l==1:
-            return x_perp, y_perp, thk
-    
-    def lower_2(data):
-        """Find the lower 2 coordinates in a web"""
-        sorted_items = sorted(data.items(), key=lambda item: item[1]['ym'])
-        smallest_two = sorted_items[:2]
-        result = [(item[1]['xm'], item[1]['ym']) for item in smallest_two]
-        return result
-    
-    def left_2(data):
-        """Find the left 2 coordinates in a flange"""
-        sorted_items = sorted(data.items(), key=lambda item: item[1]['xm'])
-        smallest_two = sorted_items[:2]
-        result = [(item[1]['xm'], item[1]['ym']) for item in smallest_two]
-        return result
-    
-    def intersect(x1, y1, x2, y2, x3, y3, x4, y4):
-        """To find intersection points of 2 lines, used to find intersection of webs and bottom flange"""
-        den = (x2 - x1) * (y4 - y3) - (y2 - y1) * (x4 - x3)
-        det_t = (x3 - x1) * (y4 - y3) - (y3 - y1) * (x4 - x3)
-        det_u = (x3 - x1) * (y2 - y1) - (y3 - y1) * (x2 - x1)
-        t = det_t / den
-        x = x1 + t * (x2 - x1)
-        y = y1 + t * (y2 - y1)
-        return (x , y)
-    
-    def ortho_line_plot(li1, li2, li3, li4, lines, d = 1, h = 1, v = 1):
-        """li1 & li2 are list of X & Y ordinates of curve 1.  li3 & li4 are X&Y of curve 2.
-        Orthogonal lines are created from curve 2 vertices on curve 1."""
-        for x3, y3 in zip(li3,li4):
-            for i in range(len(li1) - 1):
-                x1, y1 = li1[i], li2[i]
-                x2, y2 = li1[i + 1], li2[i + 1]
-                lin = perpendicular_point(x1, y1, x2, y2, x3, y3)
-                if type(lin) == tuple:
-                    if lin[2] <= d and lin[2]>=0.0001:
-                        if h == 0 and v== 0:
-                            if y3 != lin[1] and x3 != lin[0]:
-                                lines.append((x3, y3, lin[0], lin[1], lin[2]))
-                        elif h == 0:
-                            if y3 != lin[1]:
-                                lines.append((x3, y3, lin[0], lin[1], lin[2]))
-                        elif v == 0:
-                            if x3 != lin[0]:
-                                lines.append((x3, y3, lin[0], lin[1], lin[2]))
-                        else:
-                            lines.append((x3, y3, lin[0], lin[1], lin[2]))
-    
-    def point_on_line(x1, y1, x2, y2, x3, y3):
-        """Function to check if the point (x3,y3) is on line (x1,y1)-(x2,y2).  Used to distinguish dictionaries for flanges & webs."""
-        if round((y2 - y1) * (x3 - x1),5) == round((y3 - y1) * (x2 - x1),5):
-            return 1
-        else:
-            return 0
-    
-    def part_len(dic, length):
-        """Function used to divid a curve to required length."""
-        for i in range(1, len(dic)):
-            dist = ((dic[i]['xm'] - dic[i+1]['xm'])**2 + (dic[i]['ym'] - dic[i+1]['ym'])**2)**0.5
-            if dist > length:
-                nos = int(dist/length) + 1
-                for j in range(1, nos):
-                    dic.update({i+0.01*j:{
-                        'thk': dic[i]['thk']+(dic[i+1]['thk'] - dic[i]['thk'])*j/nos,
-                        'xm': dic[i]['xm']+(dic[i+1]['xm'] - dic[i]['xm'])*j/nos,
-                        'ym': dic[i]['ym']+(dic[i+1]['ym'] - dic[i]['ym'])*j/nos}})
-    
-    def reorder(dic):
-        """Reorder a dictionary based on it's keys and renumber them from 1 onwards"""
-        sorted_dic = {k:v for k,v in sorted(dic.items())}
-        new = {i: value for i, value in enumerate(sorted_dic.values(), start=1)}
-        return new
-    
-    def xysort(dic, x=1):
-        """Reorder a dictionary based on xm and ym values.  Enter x = 1 for sorting xm first and then ym.  Enter 0 for ym first and xm later."""
-        if x == 1:
-            sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['xm'], item[1]['ym']))}
-            new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=1)}
-        elif x == 0:
-            sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['ym'], item[1]['xm']))}
-            new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=1)}
-        return new_dic
-    
-    def center_top(flange):
-        x = max(value['xm'] for value in flange.values())
-        
-    def connector(web = [], flange = []):
-        """List of web dictionaries, List of flange dictionaries.  Used to create connecting lines from webs to flanges."""
-        if web !=[] and flange !=[]:
-            y2 = min(value['ym'] for value in flange[1].values())
-            
-            # Find top and bottom ordinate of each web
-            xw_max, yw_max = [], []
-            xw_min, yw_min = [], []
-            thk_min, thk_max = [], []
-            for dic in web:
-                max_ym_key = max(dic, key=lambda k: dic[k]['ym'])
-                xw_max.append(dic[max_ym_key]['xm'])
-                yw_max.append(dic[max_ym_key]['ym'])
-                thk_max.append(dic[max_ym_key]['thk'])
-                min_ym_key = min(dic, key=lambda k: dic[k]['ym'])
-                xw_min.append(dic[min_ym_key]['xm'])
-                yw_min.append(dic[min_ym_key]['ym'])
-                thk_min.append(dic[min_ym_key]['thk'])
-                
-            # Find intersection point of each web with both the flanges
-            xo_max, yo_max = [None]*len(xw_max), [None]*len(yw_max)
-            xo_min, yo_min = [], []
-            for i in range(len(xw_min)):
-                dist = 999999
-                for dic in flange:
-                    for j in range(1,len(dic)-1):
-                        pp = perpendicular_point(dic[j]['xm'], dic[j]['ym'], dic[j+1]['xm'], dic[j+1]['ym'], xw_max[i], yw_max[i])
-                        if pp != None:
-                            dist = min(dist, pp[2])
-                            if pp[2] <= dist:
-                                xo_max[i] = pp[0]
-                                yo_max[i] = pp[1]
-            flange_left_xy = left_2(flange[1])
-            web_left_xy = lower_2(web[0])
-            if len(web)>2: mid_xy = lower_2(web[2])
-            pp = intersect(web_left_xy[0][0], web_left_xy[0][1], web_left_xy[1][0], web_left_xy[1][1], 
-                        flange_left_xy[0][0], flange_left_xy[0][1], flange_left_xy[1][0], flange_left_xy[1][1])
-            xo_min.append(pp[0])
-            yo_min.append(pp[1])
-            xo_min.append(pp[0] * -1)
-            yo_min.append(pp[1])
-            if len(web)>2:
-                pp = intersect(mid_xy[0][0], mid_xy[0][1], mid_xy[1][0], mid_xy[1][1], 
-                        0, y2, 5, y2)
-                xo_min.append(pp[0])
-                yo_min.append(pp[1])
-            return [xo_max, yo_max, thk_max, xo_min, yo_min, thk_min]
-    
-    if sec not in segment:
-        segment[sec] = {} 
-    # Segmentation of polygons
-    segment['sec'] = {
-        'external': list(zip(x, y)),
-        'internal_1': list(zip(ix, iy)),
-    }
-    ortho_lines =[]
-    segment['ortho_lines'] = {
-        'line_1': [] ,
-        'line_2': []
-    }
-    if inp[sec]['SECT_BEFORE']['SHAPE'] == '2CEL':
-        segment[sec]['internal_2'] = list(zip(ix_1, iy_1))
-    
-    external_polygon = plt.Polygon(list(zip(a[0], a[1])), closed=True, fill=None, edgecolor='black')
-    plt.gca().add_patch(external_polygon)
-    
-    
-    internal_polygon = plt.Polygon(list(zip(a[2], a[3])), closed=True, fill=None, edgecolor='red')
-    plt.gca().add_patch(internal_polygon)
-            
-    
-    ortho_line_plot(a[0],a[1],a[2],a[3], ortho_lines)
-    ortho_line_plot(a[0],a[1],a[0],a[1], ortho_lines, h = 0)
-    if len(a) == 6:
-        internal_polygon = plt.Polygon(list(zip(a[4], a[5])), closed=True, fill=None, edgecolor='red')
-        plt.gca().add_patch(internal_polygon)
-        ortho_line_plot(a[0],a[1],a[4],a[5], ortho_lines)
-        ortho_line_plot(a[4],a[5],a[2],a[3], ortho_lines, d = 0.5)
-    plt.xlim(-5, 5)
-    plt.ylim(-2, 2)
-    plt.gca().set_aspect('equal', adjustable='box')
-    dic = {}
-    
-    # Plotting orthogonal lines and creating the dictionary
-    for i in range(len(ortho_lines)):
-        plt.plot([ortho_lines[i][0],ortho_lines[i][2]],[ortho_lines[i][1],ortho_lines[i][3]],'g-')
-        segment['ortho_lines']['line_1'].append([ortho_lines[i][0],ortho_lines[i][2]])
-        segment['ortho_lines']['line_2'].append([ortho_lines[i][1],ortho_lines[i][3]])
-        if (ortho_lines[i][2] - ortho_lines[i][0]) !=0:
-            m = (ortho_lines[i][3] - ortho_lines[i][1])/(ortho_lines[i][2] - ortho_lines[i][0])
-        else:
-            m = 10000
-        update = 1
-        if dic != {}:
-            for j in list(dic.keys()):
-                if dic[j]['x1'] == ortho_lines[i][0] and dic[j]['y1'] == ortho_lines[i][1] and dic[j]['x2'] == ortho_lines[i][2] and dic[j]['y2'] == ortho_lines[i][3]: update = 0
-        if update == 1:
-            dic.update({i:{
-                'x1': ortho_lines[i][0],
-                'y1': ortho_lines[i][1],
-                'x2': ortho_lines[i][2],
-                'y2': ortho_lines[i][3],
-                'thk': ortho_lines[i][4],
-                'slope': m,
-                'xm': (ortho_lines[i][0] + ortho_lines[i][2])/2,
-                'ym': (ortho_lines[i][1] + ortho_lines[i][3])/2}})
-        update = 1
-    del ortho_lines
-    
-    # Sorting the dictionary based on the vertical ordinates and then in accordance to horizontal ordinates
-    sorted_data = {k: v for k, v in sorted(dic.items(), key=lambda item: (item[1]['xm'], item[1]['ym']))}
-    new_dic = {i: value for i, value in enumerate(sorted_data.values(), start=0)}
-    del sorted_data
-    
-    # Separating and creating new dictionaries, bifurcating the webs and flanges
-    s, t, u, v, w = 1, 1, 1, 1, 1
-    mid_web, top_flange, bot_flange, left_web, right_web = {}, {}, {}, {}, {}
-    for i in new_dic.keys():
-        if point_on_line(external[0][0], external[0][1], external[1][0], external[1][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            top_flange.update({t : new_dic[i]})
-            t += 1
-        elif point_on_line(external[0][0], external[0][1], -1*external[1][0], external[1][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            top_flange.update({t : new_dic[i]})
-            t =+ 1
-        elif point_on_line(external[7][0], external[7][1], external[8][0], external[8][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            bot_flange.update({u : new_dic[i]})
-            u += 1
-        elif point_on_line(external[5][0], external[5][1], external[7][0], external[7][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            right_web.update({v : new_dic[i]})
-            v += 1
-        elif point_on_line(-1*external[5][0], external[5][1], -1*external[7][0], external[7][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            left_web.update({w : new_dic[i]})
-            w += 1
-        elif point_on_line(-1*internal[0][0], internal[0][1], -1*internal[8][0], internal[8][1], new_dic[i]['x2'], new_dic[i]['y2']) == 1:
-            mid_web.update({s : new_dic[i]})
-            s += 1
-    
-    #Creating the dictionary with connecting points
-    if mid_web == {}: li = connector([left_web, right_web],[top_flange, bot_flange])
-    if mid_web != {}: li = connector([left_web, right_web, mid_web],[top_flange, bot_flange])
-    
-    # Update flange and web dictionaries to consider end points
-    top_flange.update({0.0001:{'xm':li[0][0],
-                        'ym': li[1][0],
-                        'thk': li[2][0]},
-                    0.0002:{'xm':li[0][1],
-                        'ym': li[1][1],
-                        'thk': li[2][1]}})  
-    if mid_web != {}:
-        top_flange.update({0.0003:{'xm':li[0][2],
-                        'ym': li[1][2],
-                        'thk': li[2][2]}})
-    bot_flange.update({0.0001:{'xm':li[3][0],
-                        'ym': li[4][0],
-                        'thk': li[5][0]},
-                    0.0002:{'xm':li[3][1],
-                        'ym': li[4][1],
-                        'thk': li[5][1]}})
-    if mid_web != {}:
-        bot_flange.update({0.0003:{'xm':li[3][2],
-                        'ym': li[4][2],
-                        'thk': li[5][2]}})
-    left_web.update({0.0001:{'xm':li[0][0],
-                        'ym':li[1][0],
-                        'thk': li[2][0]},
-                    0.0002:{'xm':li[3][0],
-                        'ym':li[4][0],
-                        'thk': li[5][0]}})
-    right_web.update({0.0001:{'xm':li[0][1],
-                        'ym':li[1][1],
-                        'thk': li[2][1]},
-                    0.0002:{'xm':li[3][1],
-                        'ym':li[4][1],
-                        'thk': li[5][1]}})
-    if mid_web != {}:
-        mid_web.update({0.0001:{'xm':li[0][2],
-                            'ym':li[1][2],
-                            'thk': li[2][2]},
-                        0.0002:{'xm':li[3][2],
-                            'ym':li[4][2],
-                            'thk': li[5][2]}})
-    
-    # Sort and renumber flange and web dictionaries to consider connecting elements at proper locations
-    top_flange = xysort(top_flange,1)
-    bot_flange = xysort(bot_flange,1)
-    right_web = xysort(right_web,0)
-    left_web = xysort(left_web,0)
-    if mid_web != {}: mid_web = xysort(mid_web,0)
-    
-    # Dividing the flanges & webs close to the required length of elements
-    dictionary = [top_flange, bot_flange, right_web, left_web]
-    for i in range(len(dictionary)):
-        part_len(dictionary[i], 0.3)
-        dictionary[i] = reorder(dictionary[i])
-    top_flange = dictionary[0]
-    bot_flange = dictionary[1]
-    right_web = dictionary[2]
-    left_web = dictionary[3]
-    if mid_web != {}:
-        part_len(mid_web,0.3)
-        mid_web = reorder(mid_web)
-    
-    #Plotting the centerline of the cross section
-    segment['top_flange']={'Xm':[],'Ym':[], 'thk':[]}
-    segment['bot_flange']={'Xm':[],'Ym':[], 'thk':[]}
-    segment['left_web']={'Xm':[],'Ym':[], 'thk':[]}
-    segment['right_web']={'Xm':[],'Ym':[], 'thk':[]}
-    segment['mid_web']={'Xm':[],'Ym':[], 'thk':[]}
-     
-    for i in range(1, len(top_flange)):
-        current = top_flange[i]
-        next1 = top_flange[i + 1]
-        plt.plot([next1['xm'], current['xm']], [next1['ym'], current['ym']], 'y-', marker ='o')
-        thickness = ((current['thk'] + next1['thk'])/2)
-        segment['top_flange']['Xm'].append([next1['xm'], current['xm']])
-        segment['top_flange']['Ym'].append([next1['ym'], current['ym']])
-        segment['top_flange']['thk'].append(thickness)
-    
-    for i in range(1, len(bot_flange)):
-        current = bot_flange[i]
-        next1 = bot_flange[i + 1]
-        plt.plot([next1['xm'], current['xm']], [next1['ym'], current['ym']], 'y-', marker ='o')
-        thickness = ((current['thk'] + next1['thk'])/2)
-        segment['bot_flange']['Xm'].append([next1['xm'], current['xm']])
-        segment['bot_flange']['Ym'].append([next1['ym'], current['ym']])
-        segment['bot_flange']['thk'].append(thickness)
-        
-    for i in range(1, len(left_web)):
-        current = left_web[i]
-        next1 = left_web[i + 1]
-        plt.plot([next1['xm'], current['xm']], [next1['ym'], current['ym']], 'y-', marker ='o')
-        thickness = ((current['thk'] + next1['thk'])/2)
-        segment['left_web']['Xm'].append([next1['xm'], current['xm']])
-        segment['left_web']['Ym'].append([next1['ym'], current['ym']])
-        segment['left_web']['thk'].append(thickness)
-    
-    for i in range(1, len(right_web)):
-        current = right_web[i]
-        next1 = right_web[i + 1]
-        plt.plot([next1['xm'], current['xm']], [next1['ym'], current['ym']], 'y-', marker ='o')
-        thickness = ((current['thk'] + next1['thk'])/2)
-        segment['right_web']['Xm'].append([next1['xm'], current['xm']])
-        segment['right_web']['Ym'].append([next1['ym'], current['ym']])
-        segment['right_web']['thk'].append(thickness)
-    
-    for i in range(1, len(mid_web)):
-        current = mid_web[i]
-        next1 = mid_web[i + 1]
-        plt.plot([next1['xm'], current['xm']], [next1['ym'], current['ym']], 'y-', marker ='o')
-        thickness = ((current['thk'] + next1['thk'])/2)
-        segment['mid_web']['Ym'].append([next1['ym'], current['ym']])
-        segment['mid_web']['Ym'].append([next1['ym'], current['ym']])
-        segment['mid_web']['thk'].append(thickness)
-    # Display plot
-    fig = plt.gcf()
-    # plt.show()
-    # print(dictionary[0])
-    return fig 
-#---------------------------------------------------------------------------------------------------------------------------
-def plotsegment():
-    global array_1
-    # Initialize storage arrays
-    array_1 = {
-        'top_flange': {"X_coordinates": [], "Y_coordinates": [], "thickness": []},
-        'bot_flange': {"X_coordinates": [], "Y_coordinates": [], "thickness": []},
-        'right_web': {"X_coordinates": [], "Y_coordinates": [], "thickness": []},
-        'left_web': {"X_coordinates": [], "Y_coordinates": [], "thickness": []},
-        'mid_web': {"X_coordinates": [], "Y_coordinates": [], "thickness": []},
-    }
-    # --- TOP FLANGE ---
-    X_coord = [segment['top_flange']["Xm"][0][1]]
-    Y_coord = [segment['top_flange']["Ym"][0][1]]
-    for i in range(len(segment['top_flange']['Xm'])):
-        X_coord.append(segment['top_flange']["Xm"][i][0])
-        Y_coord.append(segment['top_flange']["Ym"][i][0])
-
-    array_1['top_flange']["X_coordinates"].append(X_coord)
-    array_1['top_flange']["Y_coordinates"].append(Y_coord)
-    array_1['top_flange']["thickness"].append(segment['top_flange']['thk'])
-    # --- BOTTOM FLANGE ---
-    X_coord = [segment['bot_flange']["Xm"][0][1]]
-    Y_coord = [segment['bot_flange']["Ym"][0][1]]
-    for i in range(len(segment['bot_flange']['Xm'])):
-        X_coord.append(segment['bot_flange']["Xm"][i][0])
-        Y_coord.append(segment['bot_flange']["Ym"][i][0])
-
-    array_1['bot_flange']["X_coordinates"].append(X_coord)
-    array_1['bot_flange']["Y_coordinates"].append(Y_coord)
-    array_1['bot_flange']["thickness"].append(segment['bot_flange']['thk'])
-    # --- LEFT WEB ---
-    X_coord = [segment['left_web']["Xm"][0][1]]
-    Y_coord = [segment['left_web']["Ym"][0][1]]
-    for i in range(len(segment['left_web']['Xm'])):
-        X_coord.append(segment['left_web']["Xm"][i][0])
-        Y_coord.append(segment['left_web']["Ym"][i][0])
-
-    array_1['left_web']["X_coordinates"].append(X_coord)
-    array_1['left_web']["Y_coordinates"].append(Y_coord)
-    array_1['left_web']["thickness"].append(segment['left_web']['thk'])
-    # --- RIGHT WEB ---
-    X_coord = [segment['right_web']["Xm"][0][1]]
-    Y_coord = [segment['right_web']["Ym"][0][1]]
-    for i in range(len(segment['right_web']['Xm'])):
-        X_coord.append(segment['right_web']["Xm"][i][0])
-        Y_coord.append(segment['right_web']["Ym"][i][0])
-
-    array_1['right_web']["X_coordinates"].append(X_coord)
-    array_1['right_web']["Y_coordinates"].append(Y_coord)
-    array_1['right_web']["thickness"].append(segment['right_web']['thk'])
-    # --- MID WEB (handle 1CEL / 2CEL cases) ---
-    if not segment.get('mid_web'):  # 1CEL PSC (no mid web)
-        array_1['mid_web']["X_coordinates"].append([0])
-        array_1['mid_web']["Y_coordinates"].append([0])
-        array_1['mid_web']["thickness"].append(0)
-    else:  # 2CEL PSC (vertical mid web)
-        Ym_values = segment['mid_web'].get('Ym', [])
-        thk = segment['mid_web'].get('thk', 0)
-        X_coord = [0 for _ in range(len(Ym_values))]
-        Y_coord = []
-        for ym in Ym_values:
-            if isinstance(ym, list):  # sometimes [[y1, y2], ...]
-                Y_coord.append(ym[1] if len(ym) > 1 else ym[0])
-            else:
-                Y_coord.append(ym)
+class CenterlineCache:
+    """LRU cache of centerline results and their figures, keyed by the content of the section (see centerline_key).
+    An edited section gets a new key, so only changed sections are recomputed.  Holds at most maxsize sections."""
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._store = OrderedDict()    #key : {'result': psc_centerline result, 'figure': matplotlib figure or None, 'exports': {format: bytes}}
+        self._lock = threading.Lock()
 
-        array_1['mid_web']["X_coordinates"].append(X_coord)
-        array_1['mid_web']["Y_coordinates"].append(Y_coord)
-        array_1['mid_web']["thickness"].append(thk)
-        
-    return array_1
-
-# Creating arrays to pass it into line to plate..  
-def build_global_arrays():
-    global array_1
-    nodes = []
-    lines = []
-    thicknesses = []
-    for part, data in array_1.items():
-        Xs = data["X_coordinates"][0]
-        Ys = data["Y_coordinates"][0]
-        Thks = data["thickness"][0]
-        # Special handling for mid_web (duplicate Y entries)
-        if part == "mid_web":
-            for i in range(len(Xs)-1):
-                n1 = [Xs[i], Ys[i]]
-                n2 = [Xs[i+1], Ys[i+1]]
-
-                if n1 not in nodes:
-                    nodes.append(n1)
-                if n2 not in nodes:
-                    nodes.append(n2)
-
-                idx1 = nodes.index(n1)
-                idx2 = nodes.index(n2)
-
-                lines.append([idx1, idx2])
-                thicknesses.append(Thks[i // 2])  # each thickness repeats twice
-        else:
-            for i in range(len(Thks)):
-                n1 = [Xs[i], Ys[i]]
-                n2 = [Xs[i+1], Ys[i+1]]
+    def get(self, key):
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                self._store.move_to_end(key)
+            return entry
+
+    def put(self, key, result):
+        with self._lock:
+            entry = self._store.setdefault(key, {'result': result, 'figure': None, 'exports': {}})
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+centerline_cache = CenterlineCache()
 
-                if n1 not in nodes:
-                    nodes.append(n1)
-                if n2 not in nodes:
-                    nodes.append(n2)
+def centerline_key(inp, prop, vectorized = True):
+    """sha1 of the section dimensions (SECT_BEFORE, in M) and Zt (in MM)."""
+    text = json.dumps(inp.get('SECT_BEFORE'), sort_keys=True) + "|" + repr(prop.get('Zt')) + "|" + str(bool(vectorized))
+    return hashlib.sha1(text.encode()).hexdigest()
 
-                idx1 = nodes.index(n1)
-                idx2 = nodes.index(n2)
+def PSC_1CEL_XY(sec, offset = "CC", vectorized = True, session = None):
+    """Section ID.  Sample:  PSC_1CEL_XY(3).  Returns the matplotlib figure of the section with its centerline.
+    The geometry comes from centerline.psc_centerline; use centerline_data(sec) when no plot is needed.
+    vectorized = False uses the scalar orthogonal line search.  The figure is cached with the result and shared by the sessions,
+    do not modify it and draw it holding figure_lock."""
+    entry = _centerline_entry(sec, vectorized, session)
+    with figure_lock:
+        if entry['figure'] is None:
+            entry['figure'] = render_centerline(entry['result'])
+    return entry['figure']
 
-                lines.append([idx1, idx2])
-                thicknesses.append(Thks[i])
+#Image formats offered for download : file extension, mime type, savefig options
+EXPORT_FORMATS = {
+    "PNG": ("png", "image/png", {"dpi": 300}),
+    "SVG": ("svg", "image/svg+xml", {}),
+    "PDF": ("pdf", "application/pdf", {}),
+}
 
-    return np.array(nodes), np.array(lines), np.array(thicknesses)
+def export_centerline(sec, fmt = "PNG", session = None):
+    """Section ID, format from EXPORT_FORMATS.  Returns the encoded image of PSC_1CEL_XY(sec) as bytes.
+    Encoding is done once per section content and format, SVG and PDF are vector and much cheaper than the 300 dpi PNG."""
+    ext, mime, opts = EXPORT_FORMATS[fmt]
+    entry = _centerline_entry(sec, session=session)
+    with figure_lock:
+        if fmt not in entry['exports']:
+            if entry['figure'] is None:
+                entry['figure'] = render_centerline(entry['result'])
+            buf = io.BytesIO()
+            entry['figure'].savefig(buf, format=ext, bbox_inches="tight", **opts)
+            entry['exports'][fmt] = buf.getvalue()
+    return entry['exports'][fmt]
 
+def centerline_data(sec, vectorized = True, session = None):
+    """Section ID.  Centerline result of psc_centerline for the section, without any plotting."""
+    return _centerline_entry(sec, vectorized, session)['result']
+
+def _centerline_entry(sec, vectorized = True, session = None):
+    # Both tables are read in the model units in one concurrent round trip and converted locally (dimensions to M, Zt to MM)
+    (sect_json, sect_to_m), (prop_json, prop_to_m) = section_cache.fetch(["SECT", "SECTPROP"], _transport(session))
+    inp = _sect_inp_table(sect_json, sec, sect_to_m)
+    prop = _sect_prop_table(prop_json, sec, length_scale=prop_to_m*1000)
+    key = centerline_key(inp[sec], prop[sec], vectorized)
+    entry = centerline_cache.get(key)
+    if entry is None:
+        entry = centerline_cache.put(key, psc_centerline(inp[sec], prop[sec], vectorized))
+    return entry
+
+def section_centerline(sec, session = None):
+    """Section ID.  Centerline object (points, thicknesses, part offsets in M) of the section, shared with PSC_1CEL_XY through the cache."""
+    return centerline_data(sec, session=session)['centerline']
+
+def render_centerline(result):
+    """Draw a psc_centerline result : outline (black / red), orthogonal lines (green) and centerline (yellow).
+    Returns a new Agg figure that is not registered with pyplot, so it is freed as soon as the caller drops it."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.patches import Polygon
+    from matplotlib.collections import LineCollection
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    outline = result['outline']
+    ax.add_patch(Polygon(outline['external'], closed=True, fill=None, edgecolor='black'))
+    ax.add_patch(Polygon(outline['internal_1'], closed=True, fill=None, edgecolor='red'))
+    if 'internal_2' in outline:
+        ax.add_patch(Polygon(outline['internal_2'], closed=True, fill=None, edgecolor='red'))
+    ax.set_xlim(-5, 5)
+    ax.set_ylim(-2, 2)
+    ax.set_aspect('equal', adjustable='box')
+    lines = result['ortho_lines']
+    ax.add_collection(LineCollection(np.stack([lines[:, 0:2], lines[:, 2:4]], axis=1), colors='g'))
+    for part in PARTS:
+        pts = result['centerline'].part(part)[0]
+        if len(pts) > 1:
+            ax.plot(pts[:, 0], pts[:, 1], 'y-', marker ='o')
+    return fig
+#---------------------------------------------------------------------------------------------------------------------------
 # Function to get PSC section for dropdown UI 
-def get_Section():
-    response = MidasAPI('GET', '/db/sect')
+def get_Section(session=None):
+    response = section_cache.get("SECT", _transport(session))
     section_list = []
 
     if 'SECT' in response:
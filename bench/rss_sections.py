@@ -0,0 +1,78 @@
+import gc
+import io
+import os
+import resource
+import sys
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend.midasfn_npg as fn
+
+# Regression benchmark of the Centerline Plot Viewer : switches between sections SWITCHES times and checks that memory stays flat.
+# No Civil NX connection is needed, the section tables are served by a stub of fn.section_cache.
+# Sample:  python bench/rss_sections.py
+
+SWITCHES = 200
+WARMUP = 50         #Switches before the reference RSS is taken (imports, caches & font loading)
+MAX_GROWTH_MB = 20  #Allowed RSS growth between the end of the warm-up and the last switch
+
+#---------------------------------------------------------------------------------------------------------------------------
+def _tables():
+    """/db/SECT & /ope/SECTPROP responses of a few PSC 1-Cell & 2-Cell sections, in M."""
+    fn.PSC_BOX.sections = []
+    fn.PSC_BOX("S1", 1, "1CEL")
+    fn.PSC_BOX("S2", 2, "2CEL", bi4=0.2, bi1=2.2, bi3=1.932)
+    fn.PSC_BOX("S3", 3, "1CEL", ho3=2.8, hi3=2.35)
+    fn.PSC_BOX("S4", 4, "1CEL", bo3=2.4, bi3=2.08)
+    fn.PSC_BOX("S5", 5, "1CEL", bo1=1.7, bi1=2.4)
+    sect = {str(k): v for k, v in fn.PSC_BOX.make_json()["Assign"].items()}
+    data = [["A", "1"]] + [["x", "1"]]*3 + [["Iy", "1"], ["Iz", "1"], ["Yl", "1"], ["Yr", "1"], ["Zt", "1.1"], ["Zb", "1.9"]] + [["x", "1"]]*6 + [["p", "1"]]*8
+    return {"SECT": {"SECT": sect}, "SECTPROP": {"SECTPROP": {k: {"DATA": data} for k in sect}}, "UNIT": {"UNIT": {"1": {"DIST": "M"}}}}
+
+class StubSectionCache(fn.SectionCache):
+    """SectionCache answering from local tables, in M."""
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+
+    def fetch(self, tables, via=None):
+        return [(self.tables[t], 1) for t in tables]
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def run(switches = SWITCHES, warmup = WARMUP, max_growth_mb = MAX_GROWTH_MB):
+    """Shows and encodes a section SWITCHES times, as app.py does on each rerun.  Returns (RSS after warm-up, last RSS) in MB."""
+    fn.section_cache = StubSectionCache(_tables())
+    fn.centerline_cache.clear()
+    ids = [sid for sid, _ in fn.get_Section()]
+    base = None
+    for i in range(switches):
+        sid = ids[i % len(ids)]
+        fig = fn.PSC_1CEL_XY(sid)
+        with fn.figure_lock:
+            fig.canvas.draw()
+        new_fig = fn.render_centerline(fn.centerline_data(sid))
+        new_fig.savefig(io.BytesIO(), format="png")
+        del fig, new_fig
+        if i + 1 == warmup:
+            gc.collect()
+            base = rss_mb()
+    gc.collect()
+    last = rss_mb()
+    assert not plt.get_fignums(), f"figures left registered in pyplot : {plt.get_fignums()}"
+    assert last - base < max_growth_mb, f"RSS grew by {last - base:.1f} MB over {switches - warmup} section switches"
+    return base, last
+
+if __name__ == "__main__":
+    base, last = run()
+    print(f"{SWITCHES} section switches : RSS {base:.1f} MB after warm-up, {last:.1f} MB at the end")